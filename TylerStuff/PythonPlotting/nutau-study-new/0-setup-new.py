@@ -3,8 +3,11 @@ import awkward as ak
 import numpy as np
 import matplotlib.pyplot as plt
 
+from nutau.projection import GEN1_BRANCHES, load
+
 # Open the ROOT file - replace with your actual file path
-file = uproot.open("/lstr/sahara/dune/tlabree/analysis/srcs/duneana/duneana/CERNWorkshop/Analysis/output_test.root")
+file_path = "/lstr/sahara/dune/tlabree/analysis/srcs/duneana/duneana/CERNWorkshop/Analysis/output_test.root"
+file = uproot.open(file_path)
 
 # Access the tree - the tree name appears to be "gen1" based on your paste
 tree = file["ana/gen1"]
@@ -13,5 +16,5 @@ tree = file["ana/gen1"]
 branches = tree.keys()
 print("Available branches:", branches)
 
-# Read the data into awkward arrays
-data = tree.arrays(library="ak")
+# Read only the branches the analyses use into awkward arrays
+data = load(file_path, "ana/gen1", GEN1_BRANCHES)
@@ -0,0 +1,94 @@
+import argparse
+
+import matplotlib.pyplot as plt
+
+from nutau import profiling
+from nutau.booking import HistBook
+from nutau.cutscan import CutScan
+from nutau.runner import run_dataset
+
+file_path = "/lstr/sahara/dune/tlabree/analysis/srcs/duneana/duneana/CERNWorkshop/Analysis/output_1000_events.root"
+
+# Discriminants that can be scanned: name -> (expression, range, side muons are kept on)
+FEATURES = {
+    "trackScore": ("trackScore", (0, 1), "above"),
+    "truncated_mean": ("truncated_mean(hitdEdx, hitResRange)", (0, 10), "below"),
+    "chi2_muon": ("chi2_muon(hitdEdx, hitResRange)", (0, 50), "below"),
+    "chi2_pion": ("chi2_pion(hitdEdx, hitResRange)", (0, 50), "above"),
+}
+
+def book_scan(features, bins):
+    """Fine histograms of each discriminant for true muon (signal) and true pion (background) tracks"""
+    book = HistBook()
+    for feature in features:
+        expression, range, _ = FEATURES[feature]
+        book.book(f"muon_{feature}", expression, bins=bins, range=range, selection="abs(truePdgCode) == 13")
+        book.book(f"pion_{feature}", expression, bins=bins, range=range, selection="abs(truePdgCode) == 211")
+    return book
+
+def cut_scan(file_paths, features=("trackScore",), bins=1000, thresholds=(0.5,),
+             save_name="./data/plots-new/cut_scan.png"):
+    """Muon vs pion efficiency, purity and ROC for a grid of cuts on each feature, from one pass over the files"""
+    book, = run_dataset(file_paths, "ana/tree", [book_scan(features, bins)], cache=True)
+    scans = {feature: CutScan(book[f"muon_{feature}"], book[f"pion_{feature}"], keep=FEATURES[feature][2])
+             for feature in features}
+
+    print(f"\n{'Feature':16}{'Muons':>10}{'Pions':>10}{'AUC':>8}   Best cut (muon eff, pion eff, purity)")
+    for feature, scan in scans.items():
+        best = scan.best()
+        side = ">=" if scan.keep == "above" else "<"
+        print(f"{feature:16}{scan.signal_total:>10}{scan.background_total:>10}{scan.auc():>8.3f}   "
+              + (f"{side} {best['threshold']:.3f} ({best['signal_efficiency']:.3f}, "
+                 f"{best['background_efficiency']:.3f}, {best['purity']:.3f})" if best else "no cut removes any pions"))
+    for feature, scan in scans.items():
+        if scan.signal_nan or scan.background_nan:
+            print(f"{feature}: {scan.signal_nan} muon and {scan.background_nan} pion tracks have no value (NaN) "
+                  f"and fail every cut")
+
+    # Working points of the first feature, e.g. the trackScores>0.5 cut of mu_v_pi.C
+    first = features[0]
+    for threshold in thresholds:
+        point = scans[first].at(threshold)
+        print(f"{first} cut at {point['threshold']:.3f}: muon efficiency {point['signal_efficiency']:.3f}, "
+              f"pion efficiency {point['background_efficiency']:.3f}, muon purity {point['purity']:.3f}")
+
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(14, 6))
+    for feature, scan in scans.items():
+        x, y = scan.roc()
+        ax1.plot(x, y, label=f"{feature} (AUC {scan.auc():.3f})")
+    ax1.plot([0, 1], [0, 1], color="grey", linestyle="--", linewidth=1)
+    ax1.set_xlabel("Pion efficiency")
+    ax1.set_ylabel("Muon efficiency")
+    ax1.set_title("ROC: muons vs pions")
+    ax1.legend()
+    ax1.grid(True, alpha=0.3)
+
+    scan = scans[first]
+    ax2.plot(scan.thresholds, scan.signal_efficiency, label="Muon efficiency")
+    ax2.plot(scan.thresholds, scan.background_efficiency, label="Pion efficiency")
+    ax2.plot(scan.thresholds, scan.purity, label="Muon purity")
+    for threshold in thresholds:
+        ax2.axvline(threshold, color="grey", linestyle=":", linewidth=1)
+    ax2.set_xlabel(f"{first} cut")
+    ax2.set_ylabel("Fraction")
+    ax2.set_ylim(0, 1.05)
+    ax2.set_title(f"Cut scan on {first} ({'keep above' if scan.keep == 'above' else 'keep below'})")
+    ax2.legend()
+    ax2.grid(True, alpha=0.3)
+
+    plt.tight_layout()
+    with profiling.stage("savefig"):
+        plt.savefig(save_name, dpi=300)
+    plt.close(fig)
+    return scans
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Muon/pion cut scan with ROC curves")
+    parser.add_argument("files", nargs="*", default=[file_path], help="ana/tree files or glob patterns")
+    parser.add_argument("--features", nargs="+", default=["trackScore"], choices=sorted(FEATURES),
+                        help="Discriminants to scan; working points are printed for the first")
+    parser.add_argument("--bins", type=int, default=1000, help="Number of thresholds scanned per feature")
+    parser.add_argument("--threshold", type=float, nargs="+", default=[0.5], help="Working points to report")
+    parser.add_argument("--output", default="./data/plots-new/cut_scan.png", help="Plot file")
+    args = parser.parse_args()
+    cut_scan(args.files, args.features, args.bins, args.threshold, args.output)
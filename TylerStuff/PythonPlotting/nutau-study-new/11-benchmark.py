@@ -0,0 +1,168 @@
+import argparse
+import json
+import os
+import resource
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import numpy as np
+
+from nutau import plots, synthetic
+from nutau.booking import HistBook
+from nutau.counting import PdgCounts
+from nutau.event_index import EventIndex
+from nutau.projection import load
+from nutau.stream import stream
+from nutau.window import WindowedReader
+
+# Sample sizes the suite runs at
+TIERS = {"1k": 1000, "100k": 100_000, "1M": 1_000_000}
+
+DATA_DIR = "synthetic-data"
+REFERENCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark-reference.json")
+
+def _checksum(counts):
+    """Order-sensitive integer fingerprint of a count array"""
+    counts = np.asarray(counts, dtype=np.int64).ravel()
+    return int(np.sum(counts * (np.arange(len(counts)) % 9973 + 1)))
+
+def _book_result(book):
+    return {name: {"entries": int(book[name].counts.sum()), "checksum": _checksum(book[name].counts)}
+            for name in book.names()}
+
+def bench_dedx(path, cache):
+    book = HistBook()
+    plots.book_dedx(book)
+    stream(path, "ana/tree", [book], cache=cache)
+    return _book_result(book)
+
+def bench_track_score(path, cache):
+    book = HistBook()
+    plots.book_track_score(book)
+    stream(path, "ana/tree", [book], cache=cache)
+    return _book_result(book)
+
+def bench_unreco(path, cache):
+    counts, = stream(path, "ana/gen1", [PdgCounts()], cache=cache)
+    return {"species": len(counts.keys), "sim": int(counts.sim.sum()), "reco": int(counts.reco.sum()),
+            "checksum": _checksum(counts.counts)}
+
+def bench_pion_spectrum(path, cache):
+    book = HistBook()
+    plots.book_pion_spectrum(book)
+    stream(path, "ana/gen1", [book], cache=cache)
+    return _book_result(book)
+
+def bench_browser(path, cache, pages=2000, jumps=200):
+    """Page forward through the first events, then jump to random ones, like the event browsers"""
+    reader = WindowedReader(path, "ana/gen1", ["eventID", "sim", "reco", "simPdgCode", "simEnergy"])
+    try:
+        n = reader.num_entries
+        indices = list(range(min(pages, n))) + np.random.default_rng(0).integers(0, n, jumps).tolist()
+        particles = sum(len(reader.event(i)["simPdgCode"][0]) for i in indices)
+    finally:
+        reader.close()
+    return {"events": len(indices), "particles": particles}
+
+def bench_event_index(path, cache, pages=2000, jumps=200):
+    """Load the gen1 tree whole, index it by eventID and visit the same events as bench_browser, like 5-page-reco2"""
+    data = load(path, "ana/gen1", ["eventID", "sim", "reco", "simPdgCode"], report=False, cache=cache)
+    index = EventIndex(data["eventID"])
+    n = len(data)
+    indices = list(range(min(pages, n))) + np.random.default_rng(0).integers(0, n, jumps).tolist()
+    event_ids = data["eventID"].to_numpy()
+    particles = sum(len(index.select(data, event_id)["simPdgCode"][0]) for event_id in event_ids[indices].tolist())
+    return {"events": len(indices), "particles": particles, "indexed": len(index)}
+
+BENCHMARKS = {
+    "dedx": bench_dedx,
+    "track_score": bench_track_score,
+    "unreco": bench_unreco,
+    "pion_spectrum": bench_pion_spectrum,
+    "browser": bench_browser,
+    "event_index": bench_event_index,
+}
+
+def _measure(name, path, cache):
+    """Run one benchmark in this (fresh) process and return its timing, memory and result"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = BENCHMARKS[name](path, cache)
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    return {"seconds": seconds, "peak_traced_mb": peak / 1e6, "max_rss_mb": max_rss / 1e6, "result": result}
+
+def dataset(tier, data_dir=DATA_DIR):
+    """Synthetic file of a tier, generated on first use"""
+    path = os.path.join(data_dir, f"synthetic_{tier}.root")
+    if not os.path.exists(path):
+        print(f"Generating {TIERS[tier]:,} synthetic events in {path}")
+        synthetic.write(path, TIERS[tier])
+    return path
+
+def run(tiers, names, data_dir=DATA_DIR, cache=False):
+    """Time every benchmark at every tier, each in its own process so memory figures don't mix"""
+    report = {}
+    for tier in tiers:
+        path = dataset(tier, data_dir)
+        for name in names:
+            with ProcessPoolExecutor(max_workers=1, mp_context=get_context("fork")) as pool:
+                report[f"{name}/{tier}"] = pool.submit(_measure, name, path, cache).result()
+            m = report[f"{name}/{tier}"]
+            print(f"{name:14}{tier:>6}{m['seconds']:>10.2f} s{m['peak_traced_mb']:>10.1f} MB traced"
+                  f"{m['max_rss_mb']:>10.1f} MB max RSS")
+    return report
+
+def check(report, reference_path=REFERENCE):
+    """Compare results with the stored reference outputs; returns the keys that differ"""
+    if not os.path.exists(reference_path):
+        print(f"No reference outputs at {reference_path}; run with --update-reference to create them")
+        return []
+    with open(reference_path) as f:
+        reference = json.load(f)
+    failed = []
+    for key, measurement in report.items():
+        if key not in reference:
+            print(f"{key:20} no reference")
+        elif measurement["result"] != reference[key]:
+            print(f"{key:20} MISMATCH")
+            failed.append(key)
+        else:
+            print(f"{key:20} ok")
+    return failed
+
+def update_reference(report, reference_path=REFERENCE):
+    reference = {}
+    if os.path.exists(reference_path):
+        with open(reference_path) as f:
+            reference = json.load(f)
+    reference.update({key: measurement["result"] for key, measurement in report.items()})
+    with open(reference_path, "w") as f:
+        json.dump(reference, f, indent=1, sort_keys=True)
+        f.write("\n")
+    print(f"Reference outputs written to {reference_path}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time and memory-profile the analysis paths on synthetic data")
+    parser.add_argument("--tiers", nargs="+", default=["1k", "100k"], choices=list(TIERS),
+                        help="Sample sizes to run at")
+    parser.add_argument("--benchmarks", nargs="+", default=list(BENCHMARKS), choices=list(BENCHMARKS))
+    parser.add_argument("--data-dir", default=DATA_DIR, help="Where the synthetic files are kept")
+    parser.add_argument("--cache", action="store_true", help="Read through the Parquet cache instead of ROOT")
+    parser.add_argument("--report", metavar="PATH", help="Write timings, memory and results as JSON")
+    parser.add_argument("--update-reference", action="store_true",
+                        help="Store these results as the reference outputs instead of checking them")
+    args = parser.parse_args()
+
+    report = run(args.tiers, args.benchmarks, args.data_dir, args.cache)
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=1)
+    if args.update_reference:
+        update_reference(report)
+    elif check(report):
+        raise SystemExit(1)
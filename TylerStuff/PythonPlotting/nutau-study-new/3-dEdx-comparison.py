@@ -1,30 +1,20 @@
-import uproot
-import awkward as ak
-import numpy as np
-import matplotlib.pyplot as plt
+import argparse
 
-file = uproot.open("/lstr/sahara/dune/tlabree/analysis/srcs/duneana/duneana/CERNWorkshop/Analysis/output_1000_events.root")
-tree = file["ana/tree"]
-data = tree.arrays(["hitdEdx", "hitResRange", "truePdgCode"], library="ak")
+from nutau import plots
+from nutau.booking import HistBook
+from nutau.stream import stream
 
-muon_mask = abs(data["truePdgCode"]) == 13
-pion_mask = abs(data["truePdgCode"]) == 211
+file_path = "/lstr/sahara/dune/tlabree/analysis/srcs/duneana/duneana/CERNWorkshop/Analysis/output_1000_events.root"
 
-muon_resrange = data["hitResRange"][muon_mask]
-muon_dedx = data["hitdEdx"][muon_mask]
+parser = argparse.ArgumentParser(description="Muon vs pion dE/dx against residual range")
+parser.add_argument("--style", choices=["image", "contour"], default="image",
+                    help="Overlaid translucent density images or per-species contours")
+args = parser.parse_args()
 
-pion_resrange = data["hitResRange"][pion_mask]
-pion_dedx = data["hitdEdx"][pion_mask]
-
-plt.figure(figsize=(8, 6))
-
-plt.scatter(ak.ravel(muon_resrange), ak.ravel(muon_dedx), label="Muons", alpha=0.05)
-plt.scatter(ak.ravel(pion_resrange), ak.ravel(pion_dedx), label="Pions", alpha=0.05)
-
-plt.xlabel("Residual Range [cm]")
-plt.ylabel("dE/dx [MeV/cm]")
-plt.legend()
-plt.xlim(0, 130)
-plt.ylim(0, 15)
-plt.savefig("data/plots-new/dEdx_scatter.png")
+# Bin muon and pion hits into fixed grids while streaming (served from the local Parquet cache after the first run),
+# so drawing costs the same however many hits there are
+book = HistBook()
+plots.book_dedx_comparison(book)
+stream(file_path, "ana/tree", [book], cache=True)
 
+plots.draw_dedx_comparison(book, "data/plots-new/dEdx_scatter.png", style=args.style)
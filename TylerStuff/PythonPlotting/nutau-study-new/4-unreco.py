@@ -1,96 +1,53 @@
-import uproot
-import awkward as ak
 import numpy as np
 import matplotlib.pyplot as plt
-from collections import Counter
-import particle
+
+from nutau.classify import is_reconstructable
+from nutau.counting import PdgCounts
+from nutau.pdg import particle_name
+from nutau.stream import stream
 
 # Open the file with your specified path
-file = uproot.open("/lstr/sahara/dune/tlabree/analysis/srcs/duneana/duneana/CERNWorkshop/Analysis/gen1_1000_events.root")
-tree = file["ana/gen1"]
-data = tree.arrays(library="ak")
-
-# Define which particles should be reconstructable
-def is_reconstructable(pdg_code):
-    # Particles that are not reconstructable (neutral particles)
-    non_reconstructable = [
-        2112,   # neutron
-        22,     # photon/gamma
-        111,    # pi0
-        310,    # K0_S
-        130,    # K0_L
-        3122,   # Lambda
-        2000000001,  # Nuclear fragments often have special codes
-        # Add more as needed
-    ]
-    
-    # Check if this is a neutral particle
-    if pdg_code in non_reconstructable:
-        return False
-    
-    # Check if it's a neutrino (PDG codes 12, 14, 16 and their antiparticles)
-    if abs(pdg_code) in [12, 14, 16]:
-        return False
-        
-    # Otherwise, it should be reconstructable
-    return True
+file_path = "/lstr/sahara/dune/tlabree/analysis/srcs/duneana/duneana/CERNWorkshop/Analysis/gen1_1000_events.root"
+
+# Particles that are not reconstructable (neutral particles and neutrinos), matched on the exact code
+NON_RECONSTRUCTABLE = {
+    2112,   # neutron
+    22,     # photon/gamma
+    111,    # pi0
+    310,    # K0_S
+    130,    # K0_L
+    3122,   # Lambda
+    2000000001,  # Nuclear fragments often have special codes
+    12, -12, 14, -14, 16, -16,  # neutrinos and antineutrinos
+}
 
 # Function to analyze both reconstructed and unreconstructed particles
 def analyze_particles():
-    # Create masks for different categories
-    sim_mask = data["sim"] == 1
-    reco_mask = data["reco"] == 1
-    
-    # Particles that are simulated but not reconstructed (sim==1, reco==0)
-    unreco_mask = sim_mask & (data["reco"] == 0)
-    
-    # Particles that are both simulated and reconstructed (sim==1, reco==1)
-    reco_mask = sim_mask & (data["reco"] == 1)
-    
-    # Extract PDG codes for both categories
-    unreco_pdg_codes = data["simPdgCode"][unreco_mask]
-    reco_pdg_codes = data["simPdgCode"][reco_mask]
-    
-    # Flatten and count
-    flat_unreco_pdg = ak.flatten(unreco_pdg_codes).to_numpy()
-    flat_reco_pdg = ak.flatten(reco_pdg_codes).to_numpy()
-    
-    unreco_counts = Counter(flat_unreco_pdg)
-    reco_counts = Counter(flat_reco_pdg)
-    
-    return unreco_counts, reco_counts
+    # Stream ana/gen1 and count simulated particles that were (sim==1, reco==1)
+    # and were not (sim==1, reco==0) reconstructed
+    counts, = stream(file_path, "ana/gen1", [PdgCounts()])
+    return counts
 
-# Get counts for both categories
-unreco_counts, reco_counts = analyze_particles()
-
-# Combine both counters to get the set of all PDG codes
-all_pdg_codes = set(unreco_counts.keys()) | set(reco_counts.keys())
+# Get counts for both categories, one entry per PDG code
+counts = analyze_particles()
+all_pdg_codes = counts.column("simPdgCode")
 
 # Sort PDG codes by total count (unreco + reco)
-sorted_pdg_codes = sorted(all_pdg_codes, 
-                          key=lambda x: (unreco_counts.get(x, 0) + reco_counts.get(x, 0)),
-                          reverse=True)
-
+order = np.argsort(-counts.sim, kind="stable")
 
-sorted_pdg_codes = [pdg for pdg in sorted_pdg_codes if is_reconstructable(pdg)]
+# Keep only the particles that should be reconstructable (not neutral particles or neutrinos)
+order = order[is_reconstructable(all_pdg_codes[order], NON_RECONSTRUCTABLE, exact=True)]
 
 # Limit to top N for better readability
-top_n = min(15, len(sorted_pdg_codes))
-top_pdg_codes = sorted_pdg_codes[:top_n]
+top = order[:15]
+top_pdg_codes = all_pdg_codes[top].tolist()
 
 # Get counts for each category
-unreco_values = [unreco_counts.get(pdg, 0) for pdg in top_pdg_codes]
-reco_values = [reco_counts.get(pdg, 0) for pdg in top_pdg_codes]
-
-# Use particle package to get proper names
-def get_particle_name(pdg_code):
-    try:
-        return particle.Particle.from_pdgid(pdg_code).name
-    except:
-        return f"PDG {pdg_code}"
-
-# Get particle names for the plot
-names = [get_particle_name(code) for code in top_pdg_codes]
+unreco_values = counts.unreco[top].tolist()
+reco_values = counts.reco[top].tolist()
+
+# Get particle names for the plot from the shared PDG table
+names = [particle_name(code) for code in top_pdg_codes]
 
 # Set up the plot
 fig, ax = plt.figure(figsize=(14, 10)), plt.axes()
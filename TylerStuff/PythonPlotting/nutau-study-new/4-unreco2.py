@@ -1,36 +1,30 @@
-import uproot
-import awkward as ak
+import os
+
 import numpy as np
 import matplotlib.pyplot as plt
-from collections import Counter
-import particle
 
-# Particles that can't be reconstructed (neutral or unstable)
-NON_RECONSTRUCTABLE = {2112, 22, 111, 310, 130, 3122, 2000000001, 1000180400, 311, -311} | {abs(nu) for nu in [12, 14, 16]}
+from nutau.classify import is_reconstructable
+from nutau.counting import PdgCounts
+from nutau.efficiency import EfficiencyCurves
+from nutau.pdg import particle_name
+from nutau.runner import run_dataset
 
 def analyze_particle_reconstruction(file_path="/lstr/sahara/dune/tlabree/analysis/srcs/duneana/duneana/CERNWorkshop/Analysis/gen1_1000_events.root", 
                            neutrino_type="muon", interaction="CC", events=1000, 
                            save_name=None):
-    # Load data and extract particle counts
-    data = uproot.open(file_path)["ana/gen1"].arrays(library="ak")
-    sim, reco = data["sim"] == 1, data["reco"] == 1
-    
-    unreco = Counter(ak.flatten(data["simPdgCode"][sim & ~reco]).to_numpy())
-    reco = Counter(ak.flatten(data["simPdgCode"][sim & reco]).to_numpy())
+    # Extract particle counts, integrated and binned in true energy, from one file, a glob or a list of files using every core
+    counts, curves = run_dataset(file_path, "ana/gen1", [PdgCounts(), EfficiencyCurves(bins=20, range=(0, 5))])
+    codes = counts.column("simPdgCode")
     
     # Get top reconstructable particles sorted by total count
-    pdgs = sorted([p for p in set(unreco) | set(reco) if abs(p) not in NON_RECONSTRUCTABLE],
-                  key=lambda p: unreco.get(p, 0) + reco.get(p, 0), reverse=True)[:10]
+    order = np.argsort(-counts.sim, kind="stable")
+    top = order[is_reconstructable(codes[order])][:10]
+    pdgs = codes[top].tolist()
     
     # Prepare plotting data with particle names
-    def get_name(p):
-        try:
-            return particle.Particle.from_pdgid(p).name
-        except:
-            return f"PDG {p}"
-    names = [get_name(p) for p in pdgs]
-    unreco_vals = [unreco.get(p, 0) for p in pdgs]
-    reco_vals = [reco.get(p, 0) for p in pdgs]
+    names = [particle_name(p) for p in pdgs]
+    unreco_vals = counts.unreco[top].tolist()
+    reco_vals = counts.reco[top].tolist()
     efficiency = [f"{(100*r/(u+r)):.1f}%" if u+r > 0 else "N/A" for u, r in zip(unreco_vals, reco_vals)]
     
     # Create plot
@@ -67,14 +61,41 @@ def analyze_particle_reconstruction(file_path="/lstr/sahara/dune/tlabree/analysi
     [print(f"{n[:19]:<20} {u:<10} {r:<10} {u+r:<10} {e:<10}")
      for n, u, r, e in zip(names, unreco_vals, reco_vals, efficiency)]
     
+    base, extension = os.path.splitext(output_file)
+    plot_efficiency_curves(curves, pdgs, save_name=f"{base}_vs_energy{extension}")
     return names, unreco_vals, reco_vals
 
+def plot_efficiency_curves(curves, pdgs, save_name, method="wilson"):
+    """Reconstruction efficiency against true energy, with binomial intervals, for the given species"""
+    codes, efficiency, low, high = curves.efficiency(method=method)
+    centres = 0.5 * (curves.edges[1:] + curves.edges[:-1])
+    half_width = 0.5 * np.diff(curves.edges)
+
+    fig, ax = plt.figure(figsize=(9, 6)), plt.axes()
+    for pdg in pdgs:
+        i = np.searchsorted(codes, pdg)
+        if i == len(codes) or codes[i] != pdg:
+            continue
+        filled = ~np.isnan(efficiency[i])
+        ax.errorbar(centres[filled], efficiency[i][filled], xerr=half_width[filled],
+                    yerr=[efficiency[i][filled] - low[i][filled], high[i][filled] - efficiency[i][filled]],
+                    fmt='o', markersize=3, capsize=2, label=particle_name(pdg)[:19])
+    ax.set(xlabel='True energy (GeV)', ylabel='Reconstruction efficiency', ylim=(0, 1.05),
+           title=f'Reconstruction efficiency vs energy ({method} intervals)')
+    ax.legend(fontsize='small', ncol=2)
+    ax.grid(linestyle='--', alpha=0.3)
+    plt.tight_layout()
+    plt.savefig(save_name)
+    plt.close(fig)
+    print(f"Efficiency curves saved to: {save_name}")
+
 if __name__ == "__main__":
     import sys
     
     if len(sys.argv) > 1:
         # Example usage with command-line arguments:
         # python script.py path/to/file.root muon CC 10000
+        # python script.py "path/to/gen1_*.root" muon CC 100000
         file_path = sys.argv[1] if len(sys.argv) > 1 else None
         nu_type = sys.argv[2] if len(sys.argv) > 2 else "muon"
         interaction = sys.argv[3] if len(sys.argv) > 3 else "CC" 
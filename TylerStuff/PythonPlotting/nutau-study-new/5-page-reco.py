@@ -1,31 +1,27 @@
-import uproot
 import awkward as ak
 import numpy as np
 from collections import Counter, defaultdict
-import particle
 import argparse
 import os
 
-# Particles that can't be reconstructed
-NON_RECONSTRUCTABLE = {2112, 22, 111, 310, 130, 3122, 2000000001, 1000180400, 311, -311} | {abs(nu) for nu in [12, 14, 16]}
-
-def get_particle_name(pdg):
-    """Get readable particle name from PDG code"""
-    try:
-        return particle.Particle.from_pdgid(pdg).name
-    except:
-        return f"PDG {pdg}"
+from nutau.classify import is_reconstructable
+from nutau.compare import sample_accumulators, stream_files
+from nutau.event_index import EventIndex
+from nutau.pdg import particle_name
+from nutau.projection import load, uses_branches
 
+@uses_branches("eventID", "sim", "reco", "simPdgCode", "simID", "nuPdgCode")
 def browse_events(file_path):
     """Browser for event-by-event particle information"""
     print(f"Loading file: {file_path}")
-    file = uproot.open(file_path)
-    tree = file["ana/gen1"]
-    data = tree.arrays(library="ak")
+    data = load(file_path, "ana/gen1", browse_events.branches)
     
     total_events = len(data["eventID"])
     print(f"Loaded {total_events} events from {file_path}")
     
+    # Index entries by eventID once so navigation does not rescan the file
+    index = EventIndex(data["eventID"])
+    
     current_event = 0
     event_stats = defaultdict(list)
     
@@ -35,16 +31,16 @@ def browse_events(file_path):
             print("End of file reached.")
             current_event = total_events - 1
             
-        # Get event mask - all entries with this event ID
+        # Get the data for this event - all entries with this event ID
         event_id = data["eventID"][current_event]
-        event_mask = data["eventID"] == event_id
+        event_data = index.select(data, event_id)
         
         # Get sim and reco status for particles in this event
-        sim_mask = data["sim"][event_mask] == 1
-        reco_mask = data["reco"][event_mask] == 1
+        sim_mask = event_data["sim"] == 1
+        reco_mask = event_data["reco"] == 1
         
         # Get PDG codes for particles in this event
-        pdg_codes = data["simPdgCode"][event_mask]
+        pdg_codes = event_data["simPdgCode"]
         
         # Count simulated particles
         sim_pdg = pdg_codes[sim_mask]
@@ -57,11 +53,11 @@ def browse_events(file_path):
         reco_counts = Counter(reco_flat)
         
         # Calculate reconstructable particles
-        reconstructable_sim = [p for p in sim_flat if abs(p) not in NON_RECONSTRUCTABLE]
-        reconstructable_reco = [p for p in reco_flat if abs(p) not in NON_RECONSTRUCTABLE]
+        reconstructable_sim = sim_flat[is_reconstructable(sim_flat)]
+        reconstructable_reco = reco_flat[is_reconstructable(reco_flat)]
         
         # Get neutrino info if available
-        nu_pdg = data["nuPdgCode"][current_event] if "nuPdgCode" in data else None
+        nu_pdg = data["nuPdgCode"][current_event] if "nuPdgCode" in data.fields else None
         
         # Display event information
         clear_screen()
@@ -69,7 +65,7 @@ def browse_events(file_path):
         print(f"Event {current_event+1}/{total_events} (ID: {event_id})")
         
         if nu_pdg is not None:
-            nu_name = get_particle_name(nu_pdg)
+            nu_name = particle_name(nu_pdg)
             print(f"Neutrino type: {nu_name} (PDG: {nu_pdg})")
         
         print("="*70)
@@ -103,7 +99,7 @@ def browse_events(file_path):
             sim_count = sim_counts.get(pdg, 0)
             reco_count = reco_counts.get(pdg, 0)
             eff = f"{reco_count/sim_count:.1%}" if sim_count > 0 else "N/A"
-            name = get_particle_name(pdg)
+            name = particle_name(pdg)
             
             print(f"{name[:24]:<25} {pdg:<8} {sim_count:<5} {reco_count:<5} {eff:<10}")
         
@@ -159,36 +155,26 @@ def display_statistics(stats):
     print(f"Average reconstructable particles per event: {np.mean(stats['reconstructable']):.1f}")
     print(f"Average reconstruction efficiency: {np.mean(stats['efficiency']):.1%}")
 
+@uses_branches("eventID", "sim", "reco", "simPdgCode")
 def compare_files(file1, file2):
-    """Compare particle statistics between two files"""
-    # Load files
-    f1 = uproot.open(file1)
-    data1 = f1["ana/gen1"].arrays(library="ak")
-    
-    f2 = uproot.open(file2)
-    data2 = f2["ana/gen1"].arrays(library="ak")
+    """Compare particle statistics between two files, streaming both at once"""
+    # Stream both files concurrently into mergeable event and per-PDG counts
+    (events1, pdg1), (events2, pdg2) = stream_files(
+        [file1, file2], lambda: sample_accumulators(with_sim_id=False))
     
     # Basic file info
-    events1 = len(data1["eventID"])
-    events2 = len(data2["eventID"])
-    
-    # Get particle counts
-    sim1 = data1["sim"] == 1
-    reco1 = data1["reco"] == 1
-    sim2 = data2["sim"] == 1
-    reco2 = data2["reco"] == 1
+    events1 = events1.n
+    events2 = events2.n
     
     # Count total particles
-    sim_counts1 = Counter(ak.flatten(data1["simPdgCode"][sim1]).to_numpy())
-    reco_counts1 = Counter(ak.flatten(data1["simPdgCode"][sim1 & reco1]).to_numpy())
-    sim_counts2 = Counter(ak.flatten(data2["simPdgCode"][sim2]).to_numpy())
-    reco_counts2 = Counter(ak.flatten(data2["simPdgCode"][sim2 & reco2]).to_numpy())
+    sim_counts1 = dict(zip(pdg1.column("simPdgCode").tolist(), pdg1.sim.tolist()))
+    sim_counts2 = dict(zip(pdg2.column("simPdgCode").tolist(), pdg2.sim.tolist()))
     
     # Total particles
-    total_sim1 = sum(sim_counts1.values())
-    total_reco1 = sum(reco_counts1.values())
-    total_sim2 = sum(sim_counts2.values())
-    total_reco2 = sum(reco_counts2.values())
+    total_sim1 = int(pdg1.sim.sum())
+    total_reco1 = int(pdg1.reco.sum())
+    total_sim2 = int(pdg2.sim.sum())
+    total_reco2 = int(pdg2.reco.sum())
     
     # Display comparison
     print("\n" + "="*70)
@@ -219,7 +205,7 @@ def compare_files(file1, file2):
         diff = sim2_count - sim1_count
         ratio = sim2_count / max(0.001, sim1_count)
         
-        name = get_particle_name(pdg)
+        name = particle_name(pdg)
         print(f"{name[:24]:<25} {pdg:<8} {sim1_count:<8.2f} {sim2_count:<8.2f} {diff:<+8.2f} {ratio:<8.2f}")
 
 if __name__ == "__main__":
@@ -1,20 +1,17 @@
-import uproot
 import awkward as ak
 import numpy as np
 from collections import Counter, defaultdict
-import particle
 import argparse
 import os
 
-# Particles that can't be reconstructed
-NON_RECONSTRUCTABLE = {2112, 22, 111, 310, 130, 3122, 2000000001, 1000180400, 311, -311} | {abs(nu) for nu in [12, 14, 16]}
-
-def get_particle_name(pdg):
-    """Get readable particle name from PDG code"""
-    try:
-        return particle.Particle.from_pdgid(pdg).name
-    except:
-        return f"PDG {pdg}"
+from nutau.classify import is_reconstructable
+from nutau.compare import sample_accumulators, stream_files
+from nutau.event_index import EventIndex
+from nutau.pdg import particle_name
+from nutau.event_stats import EventStats
+from nutau.projection import available_branches, load, uses_branches
+from nutau.runner import run_dataset
+from nutau.simid import simid_multiplicity
 
 def clear_screen():
     """Clear the terminal screen"""
@@ -22,20 +19,18 @@ def clear_screen():
 
 def analyze_event_simids(event_data, sim_mask, reco_mask):
     """Analyze particles sharing the same simID in an event"""
-    # Get simIDs for this event
-    sim_ids = event_data["simID"][sim_mask]
-    flat_sim_ids = ak.flatten(sim_ids).to_numpy()
-    
-    # Count occurrences of each simID
-    sim_id_counts = Counter(flat_sim_ids)
+    # Get simIDs and reco flags of the simulated particles in this event
+    flat_sim_ids = ak.flatten(event_data["simID"][sim_mask]).to_numpy()
+    flat_reco = ak.flatten(reco_mask[sim_mask]).to_numpy()
     
-    # Get reconstructed particles
-    reco_ids = event_data["simID"][sim_mask & reco_mask]
-    flat_reco_ids = ak.flatten(reco_ids).to_numpy()
-    reco_id_counts = Counter(flat_reco_ids)
+    # Count particles and reconstructed particles per simID in one sorted pass
+    mult = simid_multiplicity(flat_sim_ids, reco=flat_reco)
+    ids = mult.sim_id.tolist()
+    sim_id_counts = dict(zip(ids, mult.count.tolist()))
+    reco_id_counts = {id: count for id, count in zip(ids, mult.reco_count.tolist()) if count > 0}
     
     # Count simIDs with multiple particles
-    multi_ids = {id: count for id, count in sim_id_counts.items() if count > 1}
+    multi_ids = {id: count for id, count in zip(mult.sim_id[mult.multi].tolist(), mult.count[mult.multi].tolist())}
     
     # Results
     stats = {
@@ -66,8 +61,8 @@ def print_simid_analysis(stats):
             print(f"{sim_id:<10} {count:<10} {reco_count:<10} {reco_percent:<10}")
 
 def display_statistics(stats):
-    """Display aggregate statistics from browsed events"""
-    if not stats["total_sim"]:
+    """Display aggregate statistics from browsed events or from a whole-file batch pass"""
+    if not len(stats["total_sim"]):
         print("No statistics collected yet.")
         return
         
@@ -83,19 +78,24 @@ def display_statistics(stats):
     print(f"Average reconstruction efficiency: {np.mean(stats['efficiency']):.1%}")
     
     # Display simID statistics if they were collected
-    if "unique_simids" in stats and stats["unique_simids"]:
+    if "unique_simids" in stats and len(stats["unique_simids"]):
         print("\nSimID Statistics:")
         print(f"Average unique simIDs per event: {np.mean(stats['unique_simids']):.1f}")
         print(f"Average multi-particle simIDs per event: {np.mean(stats['multi_simids']):.1f}")
         
-        # Distribution of particles per simID
-        if "particles_per_id" in stats and stats["particles_per_id"]:
-            all_counts = [count for event_counts in stats["particles_per_id"] for count in event_counts]
-            multi_counts = [count for count in all_counts if count > 1]
+        # Distribution of particles per simID, as the number of simIDs carrying each particle count
+        multiplicity = stats.get("particle_multiplicity")
+        if multiplicity is None and stats.get("particles_per_id"):
+            multiplicity = np.bincount(np.concatenate([np.asarray(c, dtype=np.int64) for c in stats["particles_per_id"]]))
+        
+        if multiplicity is not None:
+            particles = np.arange(len(multiplicity))
+            multi = (particles > 1) & (multiplicity > 0)
             
-            if multi_counts:
-                bins = min(10, max(multi_counts))
-                hist, edges = np.histogram(multi_counts, bins=bins)
+            if multi.any():
+                bins = min(10, particles[multi].max())
+                hist, edges = np.histogram(particles[multi], bins=bins, weights=multiplicity[multi])
+                hist = hist.astype(np.int64)
                 
                 print("\nDistribution of particles per multi-particle simID:")
                 for i in range(len(hist)):
@@ -105,40 +105,26 @@ def display_statistics(stats):
                     bar_length = int(20 * hist[i] / max(hist)) if max(hist) > 0 else 0
                     print(f"  {bin_label:>5} particles: {'#' * bar_length} ({hist[i]})")
 
+@uses_branches("eventID", "sim", "reco", "simPdgCode", "simID")
 def compare_files(file1, file2):
-    """Compare particle statistics between two files"""
-    print(f"Loading file 1: {file1}")
-    f1 = uproot.open(file1)
-    data1 = f1["ana/gen1"].arrays(library="ak")
-    
-    print(f"Loading file 2: {file2}")
-    f2 = uproot.open(file2)
-    data2 = f2["ana/gen1"].arrays(library="ak")
-    
-    # Basic file info
-    events1 = len(data1["eventID"])
-    events2 = len(data2["eventID"])
-    
+    """Compare particle statistics between two files, streaming both at once"""
     # Check if simID exists in both files
-    has_sim_id = "simID" in data1 and "simID" in data2
+    has_sim_id = all("simID" in available_branches(f, "ana/gen1") for f in (file1, file2))
     
-    # Count particles
-    sim1 = data1["sim"] == 1
-    reco1 = data1["reco"] == 1
-    sim2 = data2["sim"] == 1
-    reco2 = data2["reco"] == 1
+    print(f"Streaming file 1: {file1}")
+    print(f"Streaming file 2: {file2}")
+    (events1, pdg1, *simid1), (events2, pdg2, *simid2) = stream_files(
+        [file1, file2], lambda: sample_accumulators(with_sim_id=has_sim_id))
     
-    # Count simulated and reconstructed particles
-    sim_pdg1 = ak.flatten(data1["simPdgCode"][sim1]).to_numpy()
-    reco_pdg1 = ak.flatten(data1["simPdgCode"][sim1 & reco1]).to_numpy()
-    sim_pdg2 = ak.flatten(data2["simPdgCode"][sim2]).to_numpy()
-    reco_pdg2 = ak.flatten(data2["simPdgCode"][sim2 & reco2]).to_numpy()
+    # Basic file info
+    events1 = events1.n
+    events2 = events2.n
     
-    # Get total counts
-    total_sim1 = len(sim_pdg1)
-    total_reco1 = len(reco_pdg1)
-    total_sim2 = len(sim_pdg2)
-    total_reco2 = len(reco_pdg2)
+    # Get total counts of simulated and reconstructed particles
+    total_sim1 = int(pdg1.sim.sum())
+    total_reco1 = int(pdg1.reco.sum())
+    total_sim2 = int(pdg2.sim.sum())
+    total_reco2 = int(pdg2.reco.sum())
     
     # Display comparison
     print("\n" + "="*70)
@@ -153,8 +139,8 @@ def compare_files(file1, file2):
     print(f"{'Avg reco per event':20} {total_reco1/events1:>15.2f} {total_reco2/events2:>15.2f} {total_reco2/events2-total_reco1/events1:>15.2f}")
     
     # Compare by particle types
-    sim_counts1 = Counter(sim_pdg1)
-    sim_counts2 = Counter(sim_pdg2)
+    sim_counts1 = dict(zip(pdg1.column("simPdgCode").tolist(), pdg1.sim.tolist()))
+    sim_counts2 = dict(zip(pdg2.column("simPdgCode").tolist(), pdg2.sim.tolist()))
     
     # Get top 10 particles
     all_pdgs = sorted(
@@ -173,34 +159,30 @@ def compare_files(file1, file2):
         diff = sim2_count - sim1_count
         ratio = sim2_count / max(0.001, sim1_count)
         
-        name = get_particle_name(pdg)
+        name = particle_name(pdg)
         print(f"{name[:24]:<25} {pdg:<8} {sim1_count:<8.2f} {sim2_count:<8.2f} {diff:<+8.2f} {ratio:<8.2f}")
     
     # SimID comparison if available
     if has_sim_id:
         print("\nSimID Analysis:")
         
-        # Process simID data for file 1
-        sim_ids1 = ak.flatten(data1["simID"][sim1]).to_numpy()
-        sim_id_counts1 = Counter(sim_ids1)
-        multi_ids1 = sum(1 for count in sim_id_counts1.values() if count > 1)
-        avg_per_id1 = sum(sim_id_counts1.values()) / len(sim_id_counts1) if sim_id_counts1 else 0
-        
-        # Process simID data for file 2
-        sim_ids2 = ak.flatten(data2["simID"][sim2]).to_numpy()
-        sim_id_counts2 = Counter(sim_ids2)
-        multi_ids2 = sum(1 for count in sim_id_counts2.values() if count > 1)
-        avg_per_id2 = sum(sim_id_counts2.values()) / len(sim_id_counts2) if sim_id_counts2 else 0
+        # Particles per simID for file 1 and file 2
+        sim_id_counts1 = simid1[0].sim
+        sim_id_counts2 = simid2[0].sim
+        multi_ids1 = int((sim_id_counts1 > 1).sum())
+        multi_ids2 = int((sim_id_counts2 > 1).sum())
+        avg_per_id1 = sim_id_counts1.mean() if len(sim_id_counts1) else 0
+        avg_per_id2 = sim_id_counts2.mean() if len(sim_id_counts2) else 0
         
         print(f"{'Unique simIDs':20} {len(sim_id_counts1):>15} {len(sim_id_counts2):>15} {len(sim_id_counts2)-len(sim_id_counts1):>15}")
         print(f"{'Multi-particle simIDs':20} {multi_ids1:>15} {multi_ids2:>15} {multi_ids2-multi_ids1:>15}")
         print(f"{'Avg particles per simID':20} {avg_per_id1:>15.2f} {avg_per_id2:>15.2f} {avg_per_id2-avg_per_id1:>15.2f}")
         
         # Histogram of particles per simID for both files
-        counts1 = [count for count in sim_id_counts1.values() if count > 1]
-        counts2 = [count for count in sim_id_counts2.values() if count > 1]
+        counts1 = sim_id_counts1[sim_id_counts1 > 1]
+        counts2 = sim_id_counts2[sim_id_counts2 > 1]
         
-        if counts1 and counts2:
+        if len(counts1) and len(counts2):
             max_count = max(max(counts1), max(counts2))
             bins = min(10, max_count)
             
@@ -215,18 +197,20 @@ def compare_files(file1, file2):
                 bin_label = f"{bin_start}" if bin_start == bin_end else f"{bin_start}-{bin_end}"
                 print(f"{bin_label:>10} {hist1[i]:>15} {hist2[i]:>15} {hist2[i]-hist1[i]:>+10}")
 
+@uses_branches("eventID", "sim", "reco", "simPdgCode", "simID", "nuPdgCode")
 def browse_events(file_path):
     """Browser for event-by-event particle information"""
     print(f"Loading file: {file_path}")
-    file = uproot.open(file_path)
-    tree = file["ana/gen1"]
-    data = tree.arrays(library="ak")
+    data = load(file_path, "ana/gen1", browse_events.branches)
     
     total_events = len(data["eventID"])
     print(f"Loaded {total_events} events from {file_path}")
     
     # Check if file has simID information
-    has_sim_id = "simID" in data
+    has_sim_id = "simID" in data.fields
+    
+    # Index entries by eventID once so navigation does not rescan the file
+    index = EventIndex(data["eventID"])
     
     current_event = 0
     event_stats = defaultdict(list)
@@ -237,12 +221,9 @@ def browse_events(file_path):
             print("End of file reached.")
             current_event = total_events - 1
             
-        # Get event mask - all entries with this event ID
+        # Extract the data for just this event - all entries with this event ID
         event_id = data["eventID"][current_event]
-        event_mask = data["eventID"] == event_id
-        
-        # Extract the data for just this event
-        event_data = data[event_mask]
+        event_data = index.select(data, event_id)
         
         # Get sim and reco masks for this event
         sim_mask = event_data["sim"] == 1
@@ -259,11 +240,11 @@ def browse_events(file_path):
         reco_counts = Counter(reco_flat)
         
         # Calculate reconstructable particles
-        reconstructable_sim = [p for p in sim_flat if abs(p) not in NON_RECONSTRUCTABLE]
-        reconstructable_reco = [p for p in reco_flat if abs(p) not in NON_RECONSTRUCTABLE]
+        reconstructable_sim = sim_flat[is_reconstructable(sim_flat)]
+        reconstructable_reco = reco_flat[is_reconstructable(reco_flat)]
         
         # Get neutrino info if available
-        nu_pdg = event_data["nuPdgCode"][0] if "nuPdgCode" in event_data else None
+        nu_pdg = event_data["nuPdgCode"][0] if "nuPdgCode" in event_data.fields else None
         
         # Clear screen and show event info
         clear_screen()
@@ -271,7 +252,7 @@ def browse_events(file_path):
         print(f"Event {current_event+1}/{total_events} (ID: {event_id})")
         
         if nu_pdg is not None:
-            nu_name = get_particle_name(nu_pdg)
+            nu_name = particle_name(nu_pdg)
             print(f"Neutrino type: {nu_name} (PDG: {nu_pdg})")
         
         print("="*70)
@@ -315,7 +296,7 @@ def browse_events(file_path):
             sim_count = sim_counts.get(pdg, 0)
             reco_count = reco_counts.get(pdg, 0)
             eff = f"{reco_count/sim_count:.1%}" if sim_count > 0 else "N/A"
-            name = get_particle_name(pdg)
+            name = particle_name(pdg)
             
             print(f"{name[:24]:<25} {pdg:<8} {sim_count:<5} {reco_count:<5} {eff:<10}")
         
@@ -350,9 +331,21 @@ def browse_events(file_path):
         else:
             print("Invalid choice")
 
+@uses_branches(*EventStats.branches)
+def batch_statistics(file_paths):
+    """Statistics summary over every event of one or more files, without browsing"""
+    print(f"Computing statistics for: {', '.join(file_paths)}")
+    stats, = run_dataset(file_paths, "ana/gen1", [EventStats()])
+    display_statistics(stats.as_stats())
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Event-by-event particle browser")
-    parser.add_argument("file_path", help="Path to ROOT file")
+    parser.add_argument("file_path", nargs="+", help="Path to ROOT file (several files or globs with --batch)")
+    parser.add_argument("--batch", action="store_true",
+                        help="Print the statistics summary for all events instead of browsing")
     args = parser.parse_args()
     
-    browse_events(args.file_path)
+    if args.batch:
+        batch_statistics(args.file_path)
+    else:
+        browse_events(args.file_path[0])
@@ -1,54 +1,32 @@
-import uproot
 import awkward as ak
 import numpy as np
 import matplotlib.pyplot as plt
-import particle
-from particle import Particle
 import os
 
-def is_visible(pdg_code, energy):
-    """
-    Determine if a particle is visible in a LArTPC detector based on PDG code and energy.
-    """
-    # Check if it's a neutrino, neutral pion, or neutron
-    if abs(pdg_code) in [12, 14, 16, 111, 2112]:
-        return False
-    
-    # Check energy thresholds for different particle types
-    if pdg_code in [211, -211]:  # Charged pions
-        return energy > 0.1
-    elif pdg_code == 2212:  # Protons
-        return energy > 0.05
-    elif pdg_code in [22, 11, -11, 13, -13]:  # Photons, Electrons, Muons
-        return energy > 0.03
-    else:
-        return True  # Default case for other particles
+from nutau.classify import is_visible
+from nutau.pdg import names as pdg_names
+from nutau.projection import uses_branches
+from nutau.simid import simid_multiplicity
+from nutau.window import WindowedReader
 
-def is_nuclear_code(pdg_code):
-    """Check if the PDG code represents a nucleus."""
-    return pdg_code > 1000000000
-
-def display_event(file_path, event_index=0):
+@uses_branches("eventID", "simID", "simPdgCode", "sim", "reco", "simGeneration", "simEnergy")
+def display_event(reader, event_index=0):
     """
     Display particle information for a specific event in a ROOT file.
     """
     # Extract filename from path
-    filename = os.path.basename(file_path)
-    
-    # Open ROOT file and access tree
-    file = uproot.open(file_path)
-    tree = file["ana/gen1"]
+    filename = os.path.basename(reader.file_path)
     
     # Get total number of events
-    n_events = tree.num_entries
+    n_events = reader.num_entries
     
     # Check if event_index is valid
     if event_index < 0 or event_index >= n_events:
         print(f"Invalid event index. Available range: 0 to {n_events-1}")
         return
     
-    # Read data for the specific event
-    event_data = tree.arrays(library="ak", entry_start=event_index, entry_stop=event_index+1)
+    # Read data for the specific event from the cached window around it
+    event_data = reader.event(event_index)
     
     # Extract event ID
     event_id = event_data["eventID"][0]
@@ -63,8 +41,7 @@ def display_event(file_path, event_index=0):
     
     # Count particles and duplicates
     total_particles = len(sim_id)
-    unique_simids = set([sid for sid in sim_id if sid != -1])
-    duplicate_count = sum([list(sim_id).count(sid) > 1 for sid in unique_simids])
+    duplicate_count = int(simid_multiplicity(ak.to_numpy(sim_id), ignore=-1).multi.sum())
     
     # Print event header as markdown
     print(f"\nFile: {filename}")
@@ -74,19 +51,19 @@ def display_event(file_path, event_index=0):
     print("| ID    | Particle    | Generation | Visible | Reconstructed | Energy (GeV) |")
     print("|-------|-------------|------------|---------|---------------|--------------|")
     
+    # Look up every particle name in one pass over the shared PDG table
+    particle_names = pdg_names(ak.to_numpy(sim_pdg), unknown="PDG:{}")
+    
+    # Classify visibility of every particle at once (nuclei are never visible)
+    visible_mask = is_visible(ak.to_numpy(sim_pdg), ak.to_numpy(sim_energy))
+    
     # Print particle information as markdown table rows
     for i in range(total_particles):
         # Format particle ID
         id_str = f"{sim_id[i]}" if sim_id[i] != -1 else "-"
         
         # Get particle name from PDG code
-        try:
-            if sim_pdg[i] != 0:
-                particle_name = Particle.from_pdgid(sim_pdg[i]).name
-            else:
-                particle_name = "Unknown"
-        except:
-            particle_name = f"PDG:{sim_pdg[i]}"
+        particle_name = particle_names[i] if sim_pdg[i] != 0 else "Unknown"
         
         # Format simulation and reconstruction flags
         reco_str = "✓" if reco_flag[i] == 1 else "✗"
@@ -95,9 +72,8 @@ def display_event(file_path, event_index=0):
         generation = str(sim_generation[i])
         energy = sim_energy[i]
         
-        # Determine if particle is visible with updated criteria
-        visible = is_visible(sim_pdg[i], energy) and not is_nuclear_code(sim_pdg[i])
-        vis_str = "✓" if visible else "✗"
+        # Visibility from the vectorized classification
+        vis_str = "✓" if visible_mask[i] else "✗"
         
         # Format energy with 3 decimal places
         energy_str = f"{energy:.3f}"
@@ -134,9 +110,12 @@ def interactive_pager():
     file_choice = input("Select file (1 or 2): ")
     file_path = mu_file if file_choice == "1" else tau_file
     
+    # Keep the file open and decode events a window at a time
+    reader = WindowedReader(file_path, "ana/gen1", display_event.branches)
+    
     # Start with the first event
     current_event = 0
-    n_events = display_event(file_path, current_event)
+    n_events = display_event(reader, current_event)
     
     # Interactive loop
     while True:
@@ -145,14 +124,14 @@ def interactive_pager():
         if command.lower() == 'n':
             if current_event < n_events - 1:
                 current_event += 1
-                n_events = display_event(file_path, current_event)
+                n_events = display_event(reader, current_event)
             else:
                 print("Already at the last event.")
         
         elif command.lower() == 'p':
             if current_event > 0:
                 current_event -= 1
-                n_events = display_event(file_path, current_event)
+                n_events = display_event(reader, current_event)
             else:
                 print("Already at the first event.")
         
@@ -161,7 +140,7 @@ def interactive_pager():
                 goto_event = int(command.split()[1]) - 1  # Convert to 0-based index
                 if 0 <= goto_event < n_events:
                     current_event = goto_event
-                    n_events = display_event(file_path, current_event)
+                    n_events = display_event(reader, current_event)
                 else:
                     print(f"Event index out of range. Valid range: 1 to {n_events}")
             except:
@@ -169,6 +148,7 @@ def interactive_pager():
         
         elif command.lower() == 'q':
             print("Exiting pager.")
+            reader.close()
             break
         
         else:
@@ -0,0 +1,129 @@
+import os
+import sys
+
+import numpy as np
+import matplotlib.pyplot as plt
+
+from nutau import profiling
+from nutau.classify import is_reconstructable
+from nutau.compare import comparison_accumulators
+from nutau.pdg import particle_name
+from nutau.plots import spectrum_name
+from nutau.runner import run_samples
+
+# Samples compared when none are given on the command line
+file_dir = "/lstr/sahara/dune/tlabree/analysis/srcs/duneana/duneana/CERNWorkshop/Analysis/"
+DEFAULT_SAMPLES = {
+    "mu CC": os.path.join(file_dir, "gen1_mu_cc_1000_events_new.root"),
+    "tau CC": os.path.join(file_dir, "gen1_tau_cc_1000_events_new.root"),
+}
+
+# First generation particles whose energy spectra are overlaid, and their binning in GeV
+SPECTRUM_PDGS = [211, -211]
+SPECTRUM_BINS = 100
+SPECTRUM_RANGE = (0, 5)
+
+def parse_samples(args):
+    """Turn label=path arguments into a dict; a bare path is labelled by its file name"""
+    samples = {}
+    for arg in args:
+        label, sep, path = arg.partition("=")
+        if not sep:
+            label, path = os.path.splitext(os.path.basename(arg))[0], arg
+        samples[label] = path
+    return samples
+
+def per_pdg_matrix(results, labels):
+    """Sim and reco counts of every sample on a common PDG axis, shape (samples, codes)"""
+    codes = np.unique(np.concatenate([results[label][1].column("simPdgCode") for label in labels]))
+    sim = np.zeros((len(labels), len(codes)), dtype=np.int64)
+    reco = np.zeros((len(labels), len(codes)), dtype=np.int64)
+    for i, label in enumerate(labels):
+        counts = results[label][1]
+        pos = np.searchsorted(codes, counts.column("simPdgCode"))
+        sim[i, pos] = counts.sim
+        reco[i, pos] = counts.reco
+    return codes, sim, reco
+
+def compare_samples(samples, top_n=10, save_name="./data/plots-new/sample_comparison.png"):
+    """Compare N labelled gen1 samples side by side, all read in one parallel pass"""
+    results = run_samples(samples, "ana/gen1", lambda: comparison_accumulators(SPECTRUM_PDGS, 1, SPECTRUM_BINS, SPECTRUM_RANGE))
+    labels = list(samples)
+    events = np.array([results[label][0].n for label in labels])
+    codes, sim, reco = per_pdg_matrix(results, labels)
+    
+    # Rank particles by their summed rate over all samples
+    rates = sim / np.maximum(events, 1)[:, None]
+    top = np.argsort(-rates.sum(axis=0), kind="stable")[:top_n]
+    header = "".join(f"{label[:11]:>12}" for label in labels)
+    
+    print("\n" + "="*(34 + 12*len(labels)))
+    print("Sample comparison: " + ", ".join(f"{label} ({samples[label]})" for label in labels))
+    print("="*(34 + 12*len(labels)))
+    print(f"{'':34}{header}")
+    print(f"{'Events':34}" + "".join(f"{n:>12}" for n in events))
+    print(f"{'Avg sim per event':34}" + "".join(f"{v:>12.2f}" for v in sim.sum(axis=1) / np.maximum(events, 1)))
+    print(f"{'Avg reco per event':34}" + "".join(f"{v:>12.2f}" for v in reco.sum(axis=1) / np.maximum(events, 1)))
+    
+    print(f"\nTop {len(top)} Particles (avg sim per event):")
+    print(f"{'Particle':<25} {'PDG':<8}{header}")
+    print("-"*(34 + 12*len(labels)))
+    for j in top:
+        print(f"{particle_name(codes[j])[:24]:<25} {codes[j]:<8}" + "".join(f"{v:>12.2f}" for v in rates[:, j]))
+    
+    # Efficiency of the most common reconstructable particles
+    eff_top = top[is_reconstructable(codes[top])]
+    efficiency = np.divide(reco, sim, out=np.full(sim.shape, np.nan), where=sim > 0)
+    print("\nReconstruction efficiency:")
+    print(f"{'Particle':<25} {'PDG':<8}{header}")
+    print("-"*(34 + 12*len(labels)))
+    for j in eff_top:
+        print(f"{particle_name(codes[j])[:24]:<25} {codes[j]:<8}"
+              + "".join(f"{v:>12.1%}" if not np.isnan(v) else f"{'N/A':>12}" for v in efficiency[:, j]))
+    
+    # Per-event simID statistics
+    stats = {label: results[label][2].as_stats() for label in labels}
+    print("\nPer-event statistics:")
+    print(f"{'':34}{header}")
+    for name, key in [("Avg reconstructable per event", "reconstructable"),
+                      ("Avg reconstruction efficiency", "efficiency"),
+                      ("Avg unique simIDs per event", "unique_simids"),
+                      ("Avg multi-particle simIDs", "multi_simids")]:
+        values = [stats[label][key].mean() if len(stats[label][key]) else np.nan for label in labels]
+        fmt = ">12.1%" if key == "efficiency" else ">12.2f"
+        print(f"{name:34}" + "".join(format(v, fmt) for v in values))
+    
+    # One figure: particle rates plus an energy spectrum panel per species
+    fig, axes = plt.subplots(1, 1 + len(SPECTRUM_PDGS), figsize=(6*(1 + len(SPECTRUM_PDGS)), 5))
+    x, w = np.arange(len(top)), 0.8 / len(labels)
+    for i, label in enumerate(labels):
+        axes[0].bar(x + (i - (len(labels) - 1)/2)*w, rates[i, top], w, label=label)
+    axes[0].set(ylabel='Particles per event', title='Simulated particle rates',
+                xticks=x, xticklabels=[particle_name(c)[:19] for c in codes[top]])
+    plt.setp(axes[0].get_xticklabels(), rotation=45, ha='right')
+    axes[0].legend()
+    axes[0].grid(axis='y', linestyle='--', alpha=0.3)
+    
+    for ax, pdg in zip(axes[1:], SPECTRUM_PDGS):
+        for label, n in zip(labels, events):
+            hist = results[label][3][spectrum_name(pdg, 1)]
+            ax.stairs(hist.counts / max(n, 1), hist.edges, label=f"{label} ({hist.entries})")
+            # Particles outside the binning are counted in the legend but not drawn
+            if hist.underflow or hist.overflow:
+                print(f"{label}: {hist.underflow} {particle_name(pdg)} below {hist.edges[0]:g} GeV and "
+                      f"{hist.overflow} above {hist.edges[-1]:g} GeV are not in the plot")
+        ax.set(xlabel='Energy (GeV)', ylabel='Particles per event',
+               title=f'First-generation {particle_name(pdg)}')
+        ax.legend()
+        ax.grid(True, alpha=0.3)
+    
+    plt.tight_layout()
+    with profiling.stage("savefig"):
+        plt.savefig(save_name)
+    print(f"\nPlots saved to: {save_name}")
+    return results
+
+if __name__ == "__main__":
+    # Example usage with command-line arguments:
+    # python 7-compare-samples.py "mu CC=path/gen1_mu_cc_*.root" "tau CC=path/gen1_tau_cc_*.root" "e CC=path/gen1_e_cc.root"
+    compare_samples(parse_samples(sys.argv[1:]) if len(sys.argv) > 1 else DEFAULT_SAMPLES)
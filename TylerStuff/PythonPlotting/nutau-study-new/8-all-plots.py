@@ -0,0 +1,48 @@
+import argparse
+
+from nutau import histfile, plots
+from nutau.accumulators import EventCount
+from nutau.runner import expand_files, shard_ranges
+from nutau.stream import stream
+
+TREE_FILE = "/lstr/sahara/dune/tlabree/analysis/srcs/duneana/duneana/CERNWorkshop/Analysis/output_1000_events.root"
+GEN1_FILE = "/lstr/sahara/dune/tlabree/analysis/srcs/duneana/duneana/CERNWorkshop/Analysis/gen1_mu_cc_1000_events_new.root"
+
+
+def fill_books(tree_file=TREE_FILE, gen1_file=GEN1_FILE, shard=None):
+    """Book every standard plot and fill each tree in one pass, only shard=(index, count) of it if given"""
+    inputs = {"ana/tree": tree_file, "ana/gen1": gen1_file}
+    inputs = {tree: expand_files(path) for tree, path in inputs.items() if path}
+    books = plots.book_all(list(inputs))
+    counters = {}
+    read = []
+    for tree, files in inputs.items():
+        book = books[tree]
+        ranges = shard_ranges(files, tree, *shard) if shard else [(path, None, None) for path in files]
+        print(f"Filling {len(book.names())} histograms from {tree}, reading {', '.join(book.branches)}")
+        events = EventCount()
+        for path, start, stop in ranges:
+            stream(path, tree, [book, events], entry_start=start, entry_stop=stop, cache=True)
+            read.append(path if start is None else f"{path}[{start}:{stop}]")
+        counters[f"{tree} events"] = events.n
+    return books, counters, {"inputs": read}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Produce all standard plots with one read per tree")
+    parser.add_argument("--tree-file", default=TREE_FILE, help="File or glob pattern with the ana/tree track tree")
+    parser.add_argument("--gen1-file", default=GEN1_FILE,
+                        help="File or glob pattern with the ana/gen1 particle tree ('' to skip)")
+    parser.add_argument("--out-dir", default="data/plots-new", help="Directory the plots are written to")
+    parser.add_argument("--save-hists", metavar="PATH",
+                        help="Also write the filled histograms to PATH for merging with 9-merge-hists.py")
+    parser.add_argument("--no-plots", action="store_true", help="Only fill (and save) the histograms")
+    parser.add_argument("--shard", type=int, nargs=2, metavar=("INDEX", "COUNT"),
+                        help="Only read shard INDEX (from 0) of COUNT equal slices of the entries")
+    args = parser.parse_args()
+
+    books, counters, metadata = fill_books(args.tree_file, args.gen1_file, args.shard)
+    if args.save_hists:
+        histfile.write(args.save_hists, books, counters, metadata)
+    if not args.no_plots:
+        plots.draw_all(books, args.out_dir, plots.sample_name(args.gen1_file))
@@ -0,0 +1,23 @@
+import argparse
+import glob
+
+from nutau import histfile, plots
+
+parser = argparse.ArgumentParser(description="Sum histogram files from several jobs and draw the standard plots")
+parser.add_argument("files", nargs="+", help="Histogram files or glob patterns written with --save-hists")
+parser.add_argument("--out-dir", default="data/plots-new", help="Directory the plots are written to")
+parser.add_argument("--output", metavar="PATH", help="Also write the merged histograms to PATH")
+args = parser.parse_args()
+
+paths = sorted(path for pattern in args.files for path in (glob.glob(pattern) or [pattern]))
+books, counters, metadata = histfile.merge(paths)
+
+print(f"Merged {len(paths)} histogram files")
+for name, value in counters.items():
+    print(f"  {name}: {value}")
+
+if args.output:
+    histfile.write(args.output, books, counters, metadata)
+# gen1 plots are named after the sample of the first gen1 input
+sample = next(filter(None, map(plots.sample_name, metadata.get("inputs", []))), "")
+plots.draw_all(books, args.out_dir, sample)
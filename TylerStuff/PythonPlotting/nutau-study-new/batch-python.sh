@@ -17,6 +17,7 @@ fi
 
 # Execute the Python command within the virtual environment
 source "$VENV_PATH"
-python $PYTHON_COMMAND
+# Parsed again by the shell so quoted arguments such as "mu CC=file.root" stay whole
+eval "python $PYTHON_COMMAND"
 deactivate
 
@@ -0,0 +1 @@
+"""Shared helpers for the nutau-study analysis scripts."""
@@ -0,0 +1,97 @@
+import numpy as np
+
+
+class Accumulator:
+    """Base class for objects filled chunk by chunk by nutau.stream"""
+
+    # Branches this accumulator needs from the tree
+    branches = ()
+
+    def fill(self, chunk):
+        raise NotImplementedError
+
+    def merge(self, other):
+        """Add the contents of another accumulator of the same kind to this one"""
+        raise NotImplementedError
+
+
+class Hist1D:
+    """Fixed-binning 1D histogram that can be filled repeatedly"""
+
+    def __init__(self, bins, range):
+        self.edges = np.linspace(range[0], range[1], bins + 1)
+        self.counts = np.zeros(bins, dtype=np.int64)
+        # Number and extent of all filled values, including those outside the binning
+        self.entries = 0
+        self.min = np.inf
+        self.max = -np.inf
+        self.underflow = 0
+        self.overflow = 0
+        # NaN values, counted but not filled anywhere
+        self.nan = 0
+
+    def fill(self, values):
+        values = np.asarray(values)
+        nan = np.isnan(values)
+        if nan.any():
+            self.nan += int(np.count_nonzero(nan))
+            values = values[~nan]
+        counts, _ = np.histogram(values, bins=self.edges)
+        self.counts += counts
+        if len(values):
+            self.entries += len(values)
+            self.min = min(self.min, float(values.min()))
+            self.max = max(self.max, float(values.max()))
+            self.underflow += int(np.count_nonzero(values < self.edges[0]))
+            self.overflow += int(np.count_nonzero(values > self.edges[-1]))
+
+    @property
+    def sumw2(self):
+        """Sum of squared weights per bin; fills are unweighted so it equals the counts"""
+        return self.counts.astype(np.float64)
+
+    def merge(self, other):
+        self.counts += other.counts
+        self.entries += other.entries
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self.underflow += other.underflow
+        self.overflow += other.overflow
+        self.nan += other.nan
+
+
+class Hist2D:
+    """Fixed-binning 2D histogram that can be filled repeatedly"""
+
+    def __init__(self, bins, range):
+        self.xedges = np.linspace(range[0][0], range[0][1], bins[0] + 1)
+        self.yedges = np.linspace(range[1][0], range[1][1], bins[1] + 1)
+        self.counts = np.zeros(bins, dtype=np.int64)
+
+    def fill(self, xs, ys):
+        counts, _, _ = np.histogram2d(xs, ys, bins=[self.xedges, self.yedges])
+        self.counts += counts.astype(np.int64)
+
+    @property
+    def sumw2(self):
+        """Sum of squared weights per bin; fills are unweighted so it equals the counts"""
+        return self.counts.astype(np.float64)
+
+    def merge(self, other):
+        self.counts += other.counts
+
+
+class EventCount(Accumulator):
+    """Number of entries (events) seen"""
+
+    branches = ("eventID",)
+
+    def __init__(self):
+        self.n = 0
+
+    def fill(self, chunk):
+        self.n += len(chunk)
+
+    def merge(self, other):
+        self.n += other.n
+
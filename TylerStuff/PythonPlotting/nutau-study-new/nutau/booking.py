@@ -0,0 +1,211 @@
+import ast
+
+import awkward as ak
+import numpy as np
+
+from nutau import pid
+from nutau.accumulators import Accumulator, Hist1D, Hist2D
+from nutau.counting import lookup_rows
+from nutau.profiling import stage
+
+# Functions that may be called in booking expressions
+FUNCTIONS = {
+    "abs": abs,
+    "sqrt": np.sqrt,
+    "log10": np.log10,
+    "exp": np.exp,
+    # Per-track PID features, e.g. "truncated_mean(hitdEdx, hitResRange)"
+    "truncated_mean": pid.truncated_mean,
+    "end_dedx": pid.end_dedx,
+    "chi2_muon": lambda dedx, res_range: pid.bragg_chi2(dedx, res_range, pid.MUON_MASS),
+    "chi2_pion": lambda dedx, res_range: pid.bragg_chi2(dedx, res_range, pid.PION_MASS),
+}
+
+
+def expression_branches(expression):
+    """Names of the tree branches an expression like 'abs(truePdgCode) == 13' reads"""
+    if expression is None:
+        return set()
+    names = {node.id for node in ast.walk(ast.parse(expression, mode="eval"))
+             if isinstance(node, ast.Name)}
+    return names - set(FUNCTIONS)
+
+
+def _flat_values(values, mask=None, dtype=None):
+    """Broadcast value arrays (and a selection mask) together and flatten the selected entries to NumPy"""
+    if mask is not None:
+        # Broadcasting lets a per-track selection pick out per-hit values and vice versa
+        *values, mask = ak.broadcast_arrays(*values, mask)
+        values = [v[mask] for v in values]
+    elif len(values) > 1:
+        values = ak.broadcast_arrays(*values)
+    return [np.asarray(ak.to_numpy(ak.ravel(v)), dtype=dtype) for v in values]
+
+
+class Booking:
+    """One booked histogram: what to fill (x, optionally y), under which selection, into what"""
+
+    def __init__(self, hist, x, y=None, selection=None, grouped=False):
+        self.hist = hist
+        self.x = x
+        self.y = y
+        self.selection = selection
+        # Filled by its GroupBooking rather than on its own
+        self.grouped = grouped
+
+    @property
+    def expressions(self):
+        return [e for e in (self.x, self.y, self.selection) if e is not None]
+
+
+class GroupBooking:
+    """Histograms of one value with common binning, one per key of a set of integer columns"""
+
+    def __init__(self, value, by, keys, names, selection=None):
+        self.value = value
+        self.by = tuple(by)
+        self.keys = np.asarray(keys, dtype=np.int64).reshape(len(keys), len(self.by))
+        self.names = list(names)
+        self.selection = selection
+
+    @property
+    def expressions(self):
+        return [self.value, *self.by] + ([self.selection] if self.selection is not None else [])
+
+    def fill(self, index, values, hists, nan=None):
+        """Fill the histograms from each value's histogram index with one bincount; nan counts NaN values per histogram"""
+        edges = hists[0].edges
+        n_bins = len(edges) - 1
+        # Column 0 is underflow, n_bins + 1 overflow; the last edge belongs to the last bin like np.histogram
+        column = np.searchsorted(edges, values, side="right")
+        column[values == edges[-1]] = n_bins
+        counts = np.bincount(index * (n_bins + 2) + column, minlength=len(hists) * (n_bins + 2))
+        counts = counts.reshape(len(hists), n_bins + 2)
+        mins = np.full(len(hists), np.inf)
+        maxs = np.full(len(hists), -np.inf)
+        np.minimum.at(mins, index, values)
+        np.maximum.at(maxs, index, values)
+        for i, hist in enumerate(hists):
+            entries = int(counts[i].sum())
+            if entries:
+                hist.counts += counts[i, 1:-1]
+                hist.underflow += int(counts[i, 0])
+                hist.overflow += int(counts[i, -1])
+                hist.entries += entries
+                hist.min = min(hist.min, mins[i])
+                hist.max = max(hist.max, maxs[i])
+        if nan is not None:
+            for hist, n in zip(hists, nan):
+                hist.nan += int(n)
+
+
+class HistBook(Accumulator):
+    """
+    Histograms booked by name against one tree and filled together.
+
+    Each booking gives a binning, a value expression (two for 2D) and an
+    optional selection, all written in terms of branch names, e.g.
+
+        book.book("muon_score", "trackScore", bins=50, range=(0, 1),
+                  selection="abs(truePdgCode) == 13")
+
+    The book reads the union of the branches its expressions use, so any
+    number of histograms costs a single pass over the file. Expressions
+    shared between bookings are only evaluated once per chunk. Values are
+    flattened to one entry per innermost element. NaNs are not filled; 1D
+    histograms count them in Hist1D.nan.
+    """
+
+    def __init__(self):
+        self.bookings = {}
+        self.groups = []
+        self.branches = ()
+
+    def book(self, name, x, bins, range, y=None, selection=None):
+        """Register a 1D histogram of x, or a 2D histogram of (x, y) when y is given"""
+        if name in self.bookings:
+            raise ValueError(f"Histogram '{name}' is already booked")
+        hist = Hist1D(bins, range) if y is None else Hist2D(bins, range)
+        self.bookings[name] = Booking(hist, x, y, selection)
+        self._add_branches(self.bookings[name].expressions)
+        return hist
+
+    def book_grouped(self, groups, value, by, bins, range, selection=None):
+        """
+        Register 1D histograms of value, one per key of the `by` columns.
+
+        groups maps histogram names to key tuples, e.g.
+        {"pip_gen1": (211, 1), "p_gen1": (2212, 1)} with
+        by=("simPdgCode", "simGeneration"). Every histogram of the group is
+        filled with one group-by per chunk, however many keys there are,
+        instead of evaluating a selection per histogram.
+        """
+        for name in groups:
+            if name in self.bookings:
+                raise ValueError(f"Histogram '{name}' is already booked")
+        group = GroupBooking(value, by, list(groups.values()), list(groups), selection)
+        for name, key in groups.items():
+            # The equivalent plain selection, kept so the booking reads the same when saved
+            cuts = [f"({column} == {k})" for column, k in zip(group.by, key)]
+            cuts = ([f"({selection})"] if selection is not None else []) + cuts
+            self.bookings[name] = Booking(Hist1D(bins, range), value, selection=" & ".join(cuts), grouped=True)
+        self.groups.append(group)
+        self._add_branches(group.expressions)
+        return [self[name] for name in groups]
+
+    def _add_branches(self, expressions):
+        branches = set(self.branches)
+        for expression in expressions:
+            branches |= expression_branches(expression)
+        self.branches = tuple(sorted(branches))
+
+    def __getitem__(self, name):
+        return self.bookings[name].hist
+
+    def __contains__(self, name):
+        return name in self.bookings
+
+    def names(self):
+        return list(self.bookings)
+
+    def fill(self, chunk):
+        namespace = {field: chunk[field] for field in chunk.fields}
+        evaluated = {}
+
+        def evaluate(expression):
+            if expression not in evaluated:
+                evaluated[expression] = eval(expression, {"__builtins__": {}, **FUNCTIONS}, namespace)
+            return evaluated[expression]
+
+        for booking in self.bookings.values():
+            if booking.grouped:
+                continue
+            with stage("evaluate"):
+                values = [evaluate(booking.x)] + ([evaluate(booking.y)] if booking.y is not None else [])
+                mask = evaluate(booking.selection) if booking.selection is not None else None
+            with stage("mask/flatten"):
+                values = _flat_values(values, mask, dtype=np.float64)
+                # Hist1D counts its NaNs itself; a 2D entry is dropped if either value is NaN
+                if len(values) > 1:
+                    valid = ~np.any([np.isnan(v) for v in values], axis=0)
+                    values = [v[valid] for v in values]
+            with stage("histogram"):
+                booking.hist.fill(*values)
+
+        for group in self.groups:
+            with stage("evaluate"):
+                mask = evaluate(group.selection) if group.selection is not None else None
+                expressions = [evaluate(group.value)] + [evaluate(e) for e in group.by]
+            with stage("mask/flatten"):
+                values, *columns = _flat_values(expressions, mask)
+                values = values.astype(np.float64)
+                index = lookup_rows(np.stack(columns, axis=1).astype(np.int64), group.keys)
+                nan = np.isnan(values)
+                keep = (index >= 0) & ~nan
+                nan = np.bincount(index[(index >= 0) & nan], minlength=len(group.names))
+            with stage("histogram"):
+                group.fill(index[keep], values[keep], [self[name] for name in group.names], nan)
+
+    def merge(self, other):
+        for name, booking in self.bookings.items():
+            booking.hist.merge(other.bookings[name].hist)
@@ -0,0 +1,90 @@
+import hashlib
+import importlib.util
+import json
+import os
+import shutil
+import tempfile
+
+import awkward as ak
+
+# Local directory holding Parquet copies of the ROOT branches scripts have read
+CACHE_DIR = os.environ.get("NUTAU_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "nutau"))
+
+# Least recently used entries are removed once the cache grows past this size
+MAX_CACHE_BYTES = int(float(os.environ.get("NUTAU_CACHE_MAX_GB", "20")) * 1e9)
+
+
+def available():
+    """The cache needs pyarrow for Parquet I/O; without it reads go straight to ROOT"""
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def cache_key(file_path, key_parts):
+    """Key an entry by source path, mtime, size and whatever else selects the data"""
+    stat = os.stat(file_path)
+    key = json.dumps([os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size, key_parts])
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+def entry_bytes(entry_dir):
+    """Size of a cache entry, 0 if another job has removed it (or part of it) meanwhile"""
+    total = 0
+    try:
+        for name in os.listdir(entry_dir):
+            total += os.path.getsize(os.path.join(entry_dir, name))
+    except FileNotFoundError:
+        pass
+    return total
+
+
+def evict(max_bytes=MAX_CACHE_BYTES):
+    """Delete least recently used entries until the cache fits in max_bytes"""
+    # Other jobs may evict the same directory at the same time, so entries can vanish at any point
+    entries = []
+    for name in os.listdir(CACHE_DIR):
+        if name.startswith("."):
+            continue
+        try:
+            entries.append((os.path.getmtime(os.path.join(CACHE_DIR, name)), os.path.join(CACHE_DIR, name)))
+        except FileNotFoundError:
+            pass
+    entries.sort()
+    sizes = {entry: entry_bytes(entry) for _, entry in entries}
+    total = sum(sizes.values())
+    for _, entry in entries:
+        if total <= max_bytes:
+            break
+        total -= sizes[entry]
+        shutil.rmtree(entry, ignore_errors=True)
+
+
+def cached_chunks(file_path, key_parts, read):
+    """
+    Yield awkward chunks for a ROOT selection, from the cache when possible.
+
+    On a miss the chunks produced by read() are written to Parquet as they
+    are yielded, so converting costs no more memory than reading. An entry
+    only becomes visible once it has been written completely.
+    """
+    entry_dir = os.path.join(CACHE_DIR, cache_key(file_path, key_parts))
+    if os.path.isdir(entry_dir):
+        # Mark the entry as recently used for eviction
+        os.utime(entry_dir)
+        for name in sorted(os.listdir(entry_dir)):
+            yield ak.from_parquet(os.path.join(entry_dir, name))
+        return
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(prefix=".tmp-", dir=CACHE_DIR)
+    try:
+        for i, chunk in enumerate(read()):
+            ak.to_parquet(chunk, os.path.join(tmp_dir, f"chunk-{i:05d}.parquet"))
+            yield chunk
+        try:
+            os.rename(tmp_dir, entry_dir)
+        except OSError:
+            # Another job finished converting the same selection first
+            pass
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    evict()
@@ -0,0 +1,84 @@
+import awkward as ak
+import numpy as np
+
+# Particles that can't be reconstructed (neutral or unstable), matched on |PDG|
+NON_RECONSTRUCTABLE = frozenset({2112, 22, 111, 310, 130, 3122, 2000000001, 1000180400, 311, 12, 14, 16})
+
+# Particles that never leave a visible trace in a LArTPC, matched on |PDG|
+INVISIBLE = frozenset({12, 14, 16, 111, 2112})
+
+# Minimum true energy (GeV) for a particle to count as visible; species not listed have no threshold
+VISIBILITY_THRESHOLDS = {
+    211: 0.1, -211: 0.1,     # Charged pions
+    2212: 0.05,              # Protons
+    22: 0.03,                # Photons
+    11: 0.03, -11: 0.03,     # Electrons
+    13: 0.03, -13: 0.03,     # Muons
+}
+
+# PDG codes above this are nuclei
+NUCLEAR_THRESHOLD = 1000000000
+
+
+def _flatten(array):
+    """Flat NumPy view of a flat or one-level jagged array, plus the counts to rebuild it"""
+    if isinstance(array, ak.Array) and array.ndim > 1:
+        return ak.to_numpy(ak.flatten(array)), ak.num(array)
+    return np.asarray(array), None
+
+
+def _restore(mask, counts):
+    return mask if counts is None else ak.unflatten(mask, counts)
+
+
+def is_nuclear(pdg_codes):
+    """Mask of nuclear PDG codes"""
+    codes, counts = _flatten(pdg_codes)
+    return _restore(codes > NUCLEAR_THRESHOLD, counts)
+
+
+def is_reconstructable(pdg_codes, non_reconstructable=NON_RECONSTRUCTABLE, exact=False):
+    """Mask of particles that could in principle be reconstructed; exact=True matches signed codes, not |PDG|"""
+    codes, counts = _flatten(pdg_codes)
+    return _restore(~np.isin(codes if exact else np.abs(codes), list(non_reconstructable)), counts)
+
+
+def energy_thresholds(pdg_codes, thresholds=VISIBILITY_THRESHOLDS):
+    """Per-particle visibility threshold looked up with one searchsorted, -inf where none applies"""
+    codes = np.asarray(pdg_codes)
+    keys = np.array(sorted(thresholds), dtype=np.int64)
+    values = np.array([thresholds[k] for k in keys], dtype=np.float64)
+    out = np.full(codes.shape, -np.inf)
+    if len(keys):
+        pos = np.clip(np.searchsorted(keys, codes), 0, len(keys) - 1)
+        hit = keys[pos] == codes
+        out[hit] = values[pos[hit]]
+    return out
+
+
+def is_visible(pdg_codes, energies, thresholds=VISIBILITY_THRESHOLDS, invisible=INVISIBLE):
+    """Mask of particles visible in the detector: not invisible species, not nuclei, above threshold"""
+    codes, counts = _flatten(pdg_codes)
+    energy, _ = _flatten(energies)
+    visible = (~np.isin(np.abs(codes), list(invisible))
+               & (codes <= NUCLEAR_THRESHOLD)
+               & (energy > energy_thresholds(codes, thresholds)))
+    return _restore(visible, counts)
+
+
+def classify(pdg_codes, energies, thresholds=VISIBILITY_THRESHOLDS,
+             non_reconstructable=NON_RECONSTRUCTABLE):
+    """Visible, reconstructable and nuclear masks for a whole (jagged) array in one go"""
+    return {
+        "visible": is_visible(pdg_codes, energies, thresholds),
+        "reconstructable": is_reconstructable(pdg_codes, non_reconstructable),
+        "nuclear": is_nuclear(pdg_codes),
+    }
+
+
+def reconstructable_counts(data, non_reconstructable=NON_RECONSTRUCTABLE):
+    """Per-event numbers of simulated and of simulated+reconstructed reconstructable particles"""
+    sim = data["sim"] == 1
+    reco = data["reco"] == 1
+    reconstructable = is_reconstructable(data["simPdgCode"], non_reconstructable)
+    return ak.sum(sim & reconstructable, axis=1), ak.sum(sim & reco & reconstructable, axis=1)
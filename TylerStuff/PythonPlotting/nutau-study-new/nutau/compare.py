@@ -0,0 +1,39 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from nutau import plots
+from nutau.accumulators import EventCount
+from nutau.booking import HistBook
+from nutau.counting import PdgCounts
+from nutau.event_stats import EventStats
+from nutau.stream import DEFAULT_STEP_SIZE, stream
+
+
+def sample_accumulators(with_sim_id=True):
+    """Mergeable summaries used to compare gen1 samples: events, per-PDG counts, per-simID counts"""
+    accumulators = [EventCount(), PdgCounts()]
+    if with_sim_id:
+        accumulators.append(PdgCounts(by=("simID",)))
+    return accumulators
+
+
+def comparison_accumulators(spectrum_pdgs=(211, -211), generation=1, bins=100, range=(0, 5)):
+    """
+    Everything the N-way sample comparison needs, filled in one pass over a
+    sample; the energy spectra are booked with plots.book_spectra.
+    """
+    spectra = HistBook()
+    plots.book_spectra(spectra, spectrum_pdgs, (generation,), bins, range)
+    return [EventCount(), PdgCounts(), EventStats(), spectra]
+
+
+def stream_files(file_paths, make_accumulators, tree_name="ana/gen1", step_size=DEFAULT_STEP_SIZE):
+    """
+    Stream several files at the same time, one thread per file.
+
+    Returns one list of filled accumulators per file. Memory is bounded by
+    step_size per file, whatever the file sizes.
+    """
+    with ThreadPoolExecutor(max_workers=len(file_paths)) as pool:
+        futures = [pool.submit(stream, path, tree_name, make_accumulators(), step_size)
+                   for path in file_paths]
+        return [future.result() for future in futures]
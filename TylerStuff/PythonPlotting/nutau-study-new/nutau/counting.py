@@ -0,0 +1,150 @@
+import awkward as ak
+import numpy as np
+
+from nutau.accumulators import Accumulator
+from nutau.profiling import stage
+
+
+def row_ids(keys):
+    """
+    Encode each row of an (n, k) integer key array as one int64.
+
+    Each column is factorized separately and the codes are combined in
+    mixed radix, which keeps the lexicographic order of the rows and lets
+    a 1D np.unique do the grouping.
+    """
+    if keys.shape[1] == 1:
+        return keys[:, 0]
+    ids = np.zeros(len(keys), dtype=np.int64)
+    for j in range(keys.shape[1]):
+        unique, inverse = np.unique(keys[:, j], return_inverse=True)
+        ids = ids * len(unique) + inverse.reshape(-1)
+    return ids
+
+
+def lookup_rows(rows, table):
+    """
+    Position of each row of an (n, k) integer array in a (m, k) table of
+    distinct key rows, -1 for rows not in the table.
+
+    Columns are matched against the table's own values with searchsorted,
+    so the cost grows with log(m) rather than with a sort of the rows.
+    """
+    code = np.zeros(len(rows), dtype=np.int64)
+    table_code = np.zeros(len(table), dtype=np.int64)
+    found = np.ones(len(rows), dtype=bool)
+    size = 1
+    for j in range(table.shape[1]):
+        values = np.unique(table[:, j])
+        pos = np.clip(np.searchsorted(values, rows[:, j]), 0, len(values) - 1)
+        found &= values[pos] == rows[:, j]
+        code = code * len(values) + pos
+        table_code = table_code * len(values) + np.searchsorted(values, table[:, j])
+        size *= len(values)
+    positions = np.full(size, -1, dtype=np.int64)
+    positions[table_code] = np.arange(len(table))
+    return np.where(found, positions[code], -1)
+
+
+def aggregate(keys, weights):
+    """
+    Sum weight rows over identical key rows.
+
+    keys is an (n, k) integer array of category keys and weights an (n, m)
+    array; returns the sorted unique keys and the (n_unique, m) sums,
+    computed with np.unique and a bincount per weight column.
+    """
+    if len(keys) == 0:
+        return keys, weights
+    ids = row_ids(keys)
+    unique = np.unique(ids)
+    inverse = np.searchsorted(unique, ids)
+    first = np.zeros(len(unique), dtype=np.int64)
+    first[inverse] = np.arange(len(ids))
+    sums = np.stack([np.bincount(inverse, weights=weights[:, j], minlength=len(unique))
+                     for j in range(weights.shape[1])], axis=1)
+    return keys[first], sums.astype(weights.dtype)
+
+
+class PdgCounts(Accumulator):
+    """
+    Simulated / reconstructed particle counts per category of ana/gen1.
+
+    Categories are keyed by simPdgCode by default; passing
+    by=("simGeneration", "simPdgCode") or by=("eventID", "simPdgCode")
+    counts per generation or per event instead. Counts live in dense
+    arrays (one row per category) so filling and merging never loop
+    over particles in Python. Per-chunk results are only combined when
+    the counts are read, so filling stays linear in the number of chunks.
+    """
+
+    # Combine pending per-chunk results once this many have piled up
+    MAX_PENDING = 64
+
+    def __init__(self, by=("simPdgCode",)):
+        self.by = tuple(by)
+        self.branches = tuple(sorted({"sim", "reco", "simPdgCode"} | set(self.by)))
+        self._keys = np.empty((0, len(self.by)), dtype=np.int64)
+        self._counts = np.empty((0, 2), dtype=np.int64)
+        self._pending = []
+
+    def fill(self, chunk):
+        with stage("mask/flatten"):
+            sim = chunk["sim"] == 1
+            reco = ak.to_numpy(ak.flatten((chunk["reco"] == 1)[sim]))
+            columns = []
+            for name in self.by:
+                column = self.key_column(chunk, name)
+                if column.ndim == 1:
+                    # Per-entry branches such as eventID are repeated for each particle
+                    column = ak.broadcast_arrays(column, chunk["simPdgCode"])[0]
+                columns.append(ak.to_numpy(ak.flatten(column[sim])).astype(np.int64))
+            keys = np.stack(columns, axis=1)
+            weights = np.stack([np.ones(len(reco), dtype=np.int64), reco.astype(np.int64)], axis=1)
+        with stage("aggregate"):
+            self._add(*aggregate(keys, weights))
+
+    def key_column(self, chunk, name):
+        """Column a key is read from; subclasses can derive keys from other branches"""
+        return chunk[name]
+
+    def merge(self, other):
+        self._add(other.keys, other.counts)
+
+    def _add(self, keys, counts):
+        self._pending.append((keys, counts))
+        if len(self._pending) >= self.MAX_PENDING:
+            self._compact()
+
+    def _compact(self):
+        if self._pending:
+            keys = [self._keys] + [keys for keys, _ in self._pending]
+            counts = [self._counts] + [counts for _, counts in self._pending]
+            self._keys, self._counts = aggregate(np.concatenate(keys), np.concatenate(counts))
+            self._pending = []
+
+    @property
+    def keys(self):
+        self._compact()
+        return self._keys
+
+    @property
+    def counts(self):
+        self._compact()
+        return self._counts
+
+    @property
+    def sim(self):
+        return self.counts[:, 0]
+
+    @property
+    def reco(self):
+        return self.counts[:, 1]
+
+    @property
+    def unreco(self):
+        return self.counts[:, 0] - self.counts[:, 1]
+
+    def column(self, name):
+        """Key values of one of the `by` columns, aligned with sim/reco/unreco"""
+        return self.keys[:, self.by.index(name)]
@@ -0,0 +1,102 @@
+import numpy as np
+
+
+def total(hist):
+    """All entries of a Hist1D: in the bins, under- and overflow, and NaN"""
+    return hist.underflow + int(hist.counts.sum()) + hist.overflow + hist.nan
+
+
+def passing(hist, keep="above"):
+    """
+    Number of entries passing a cut at every bin edge of a Hist1D.
+
+    keep="above" counts the entries in bins starting at or above the edge
+    plus the overflow, keep="below" those in the bins below it plus the
+    underflow; this is >= edge and < edge except at the last edge, where
+    values equal to it fill the last bin and so count as below. So the
+    underflow fails "above" even at the first edge and the overflow fails
+    "below" even at the last. NaN entries pass neither. One cumulative sum
+    covers every threshold.
+    """
+    above = np.concatenate([np.cumsum(hist.counts[::-1])[::-1], [0]]) + hist.overflow
+    if keep == "above":
+        return above
+    if keep == "below":
+        return hist.underflow + hist.counts.sum() + hist.overflow - above
+    raise ValueError(f"keep must be 'above' or 'below', not {keep!r}")
+
+
+class CutScan:
+    """
+    Efficiency, purity and ROC of a one-sided cut on a discriminant, at every bin edge.
+
+    signal and background are Hist1Ds of the discriminant with identical
+    binning, e.g. the track score of true muons and of true pions; the
+    finer the binning the denser the threshold grid. Efficiencies are
+    relative to every entry, NaNs (tracks without a value) included.
+    """
+
+    def __init__(self, signal, background, keep="above"):
+        if not np.array_equal(signal.edges, background.edges):
+            raise ValueError("Signal and background histograms need the same binning")
+        self.keep = keep
+        self.thresholds = signal.edges
+        self.signal_pass = passing(signal, keep)
+        self.background_pass = passing(background, keep)
+        self.signal_total = total(signal)
+        self.background_total = total(background)
+        self.signal_nan = signal.nan
+        self.background_nan = background.nan
+
+    @property
+    def signal_efficiency(self):
+        return self.signal_pass / max(self.signal_total, 1)
+
+    @property
+    def background_efficiency(self):
+        return self.background_pass / max(self.background_total, 1)
+
+    @property
+    def background_rejection(self):
+        return 1 - self.background_efficiency
+
+    @property
+    def purity(self):
+        """Signal fraction of the passing sample, NaN where nothing passes"""
+        passed = self.signal_pass + self.background_pass
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(passed > 0, self.signal_pass / passed, np.nan)
+
+    def roc(self):
+        """(background efficiency, signal efficiency) points ordered by background efficiency, closed at (0,0) and (1,1)"""
+        x = np.concatenate([[0.0], self.background_efficiency, [1.0]])
+        y = np.concatenate([[0.0], self.signal_efficiency, [1.0]])
+        order = np.lexsort((y, x))
+        return x[order], y[order]
+
+    def auc(self):
+        """Area under the ROC curve"""
+        x, y = self.roc()
+        return float(np.sum(np.diff(x) * (y[1:] + y[:-1]) / 2))
+
+    def at(self, threshold):
+        """Efficiencies and purity of the grid threshold closest to the given one"""
+        i = int(np.argmin(np.abs(self.thresholds - threshold)))
+        return {
+            "threshold": float(self.thresholds[i]),
+            "signal_efficiency": float(self.signal_efficiency[i]),
+            "background_efficiency": float(self.background_efficiency[i]),
+            "purity": float(self.purity[i]),
+        }
+
+    def best(self):
+        """
+        Working point maximising signal efficiency times purity among the
+        cuts that remove some background, or None if none does.
+        """
+        score = np.nan_to_num(self.signal_efficiency * self.purity)
+        # A threshold passing all background with a value (e.g. the first edge) is no cut at all
+        cuts = self.background_pass < self.background_total - self.background_nan
+        if not cuts.any():
+            return None
+        return self.at(self.thresholds[int(np.argmax(np.where(cuts, score, -1)))])
@@ -0,0 +1,98 @@
+import importlib.util
+from statistics import NormalDist
+
+import awkward as ak
+import numpy as np
+
+from nutau.counting import PdgCounts
+
+# Confidence level of a one standard deviation interval
+ONE_SIGMA = 0.6827
+
+
+def wilson(k, n, cl=ONE_SIGMA):
+    """Wilson score interval (low, high) of k successes out of n, for arrays of any shape; NaN where n == 0"""
+    k, n = np.asarray(k, dtype=np.float64), np.asarray(n, dtype=np.float64)
+    z = NormalDist().inv_cdf(0.5 + cl / 2)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        p = k / n
+        denominator = 1 + z**2 / n
+        centre = (p + z**2 / (2 * n)) / denominator
+        half = z * np.sqrt(p * (1 - p) / n + z**2 / (4 * n**2)) / denominator
+    # The bounds are exactly 0 and 1 at the edges; pin them against rounding
+    low = np.where(k == 0, 0.0, np.clip(centre - half, 0, 1))
+    high = np.where(k == n, 1.0, np.clip(centre + half, 0, 1))
+    return np.where(n == 0, np.nan, low), np.where(n == 0, np.nan, high)
+
+
+def clopper_pearson(k, n, cl=ONE_SIGMA):
+    """Exact Clopper-Pearson interval (low, high) of k successes out of n; needs scipy for beta quantiles"""
+    if importlib.util.find_spec("scipy") is None:
+        raise ImportError("Clopper-Pearson intervals need scipy; use method='wilson' or pip install scipy")
+    from scipy.stats import beta
+
+    k, n = np.asarray(k, dtype=np.float64), np.asarray(n, dtype=np.float64)
+    alpha = 1 - cl
+    with np.errstate(invalid="ignore"):
+        low = np.where(k > 0, beta.ppf(alpha / 2, k, n - k + 1), 0.0)
+        high = np.where(k < n, beta.ppf(1 - alpha / 2, k + 1, n - k), 1.0)
+    empty = n == 0
+    return np.where(empty, np.nan, low), np.where(empty, np.nan, high)
+
+
+INTERVALS = {"wilson": wilson, "clopper-pearson": clopper_pearson}
+
+
+class EfficiencyCurves(PdgCounts):
+    """
+    Simulated and reconstructed particle counts of ana/gen1 binned in simEnergy, for every species.
+
+    Each particle is keyed by (simPdgCode[, simGeneration], energy bin), so
+    one pass fills the sim / sim&reco 2D histograms of all species together
+    and partial results merge like PdgCounts. Energy bin 0 is underflow and
+    bins + 1 overflow.
+    """
+
+    def __init__(self, bins=20, range=(0, 5), by_generation=False):
+        by = ("simPdgCode", "simGeneration") if by_generation else ("simPdgCode",)
+        super().__init__(by=by + ("energyBin",))
+        self.edges = np.linspace(range[0], range[1], bins + 1)
+        self.branches = tuple(sorted((set(self.branches) - {"energyBin"}) | {"simEnergy"}))
+
+    def key_column(self, chunk, name):
+        if name != "energyBin":
+            return chunk[name]
+        energy = chunk["simEnergy"]
+        flat = ak.to_numpy(ak.flatten(energy))
+        # The last edge belongs to the last bin, as in np.histogram
+        column = np.searchsorted(self.edges, flat, side="right")
+        column[flat == self.edges[-1]] = len(self.edges) - 1
+        return ak.unflatten(column, ak.num(energy))
+
+    def matrix(self, generation=None):
+        """
+        Species codes and their (species, energy bin) sim and reco count matrices.
+
+        Only in-range bins are returned; generations are summed unless one is given.
+        """
+        keys, counts = self.keys, self.counts
+        if generation is not None:
+            keep = keys[:, self.by.index("simGeneration")] == generation
+            keys, counts = keys[keep], counts[keep]
+        codes, row = np.unique(keys[:, 0], return_inverse=True)
+        n_bins = len(self.edges) - 1
+        column = keys[:, -1]
+        in_range = (column >= 1) & (column <= n_bins)
+        sim = np.zeros((len(codes), n_bins), dtype=np.int64)
+        reco = np.zeros((len(codes), n_bins), dtype=np.int64)
+        np.add.at(sim, (row[in_range], column[in_range] - 1), counts[in_range, 0])
+        np.add.at(reco, (row[in_range], column[in_range] - 1), counts[in_range, 1])
+        return codes, sim, reco
+
+    def efficiency(self, generation=None, method="wilson", cl=ONE_SIGMA):
+        """Species codes plus (species, energy bin) efficiency, interval low and high, all bins at once"""
+        codes, sim, reco = self.matrix(generation)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            efficiency = np.where(sim > 0, reco / np.maximum(sim, 1), np.nan)
+        low, high = INTERVALS[method](reco, sim, cl)
+        return codes, efficiency, low, high
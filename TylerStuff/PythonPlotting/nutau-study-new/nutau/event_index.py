@@ -0,0 +1,39 @@
+import awkward as ak
+import numpy as np
+
+
+class EventIndex:
+    """
+    Maps eventID to the tree entries holding that event.
+
+    Built once with a single sort, after which looking up an event is a
+    dict access plus a small slice instead of a scan over the whole file.
+    """
+
+    def __init__(self, event_ids):
+        ids = ak.to_numpy(event_ids)
+        self.order = np.argsort(ids, kind="stable")
+        unique, starts, counts = np.unique(ids[self.order], return_index=True, return_counts=True)
+        self.ranges = {
+            event_id: (start, start + count)
+            for event_id, start, count in zip(unique.tolist(), starts.tolist(), counts.tolist())
+        }
+
+    def __len__(self):
+        return len(self.ranges)
+
+    def __contains__(self, event_id):
+        return event_id in self.ranges
+
+    def entries(self, event_id):
+        """Tree entry numbers of one event, in file order"""
+        start, stop = self.ranges[event_id]
+        return self.order[start:stop]
+
+    def select(self, data, event_id):
+        """The rows of data belonging to one event"""
+        entries = self.entries(event_id)
+        if len(entries) == 1:
+            return data[entries[0]:entries[0] + 1]
+        return data[entries]
+
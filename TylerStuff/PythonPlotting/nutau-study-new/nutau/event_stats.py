@@ -0,0 +1,63 @@
+import awkward as ak
+import numpy as np
+
+from nutau.accumulators import Accumulator
+from nutau.classify import reconstructable_counts
+from nutau.simid import simid_multiplicity
+
+
+class EventStats(Accumulator):
+    """
+    Per-event particle and simID statistics for every event of ana/gen1.
+
+    Holds the same quantities the 5-page-reco2 browser collects while
+    paging, but filled for whole chunks at once. The particles-per-simID
+    distribution is kept as a bincount so it stays small and mergeable.
+    """
+
+    branches = ("sim", "reco", "simPdgCode", "simID")
+
+    def __init__(self):
+        self.columns = {name: [] for name in
+                        ("total_sim", "total_reco", "reconstructable", "efficiency",
+                         "unique_simids", "multi_simids")}
+        self.particle_multiplicity = np.zeros(0, dtype=np.int64)
+
+    def fill(self, chunk):
+        sim = chunk["sim"] == 1
+        reco = chunk["reco"] == 1
+        total_sim = ak.to_numpy(ak.sum(sim, axis=1))
+        total_reco = ak.to_numpy(ak.sum(sim & reco, axis=1))
+        reconstructable_sim, reconstructable_reco = (ak.to_numpy(n) for n in reconstructable_counts(chunk))
+
+        # Like the browser, only events with reconstructable particles enter the efficiency averages
+        has_reconstructable = reconstructable_sim > 0
+        self.columns["total_sim"].append(total_sim[has_reconstructable])
+        self.columns["total_reco"].append(total_reco[has_reconstructable])
+        self.columns["reconstructable"].append(reconstructable_sim[has_reconstructable])
+        self.columns["efficiency"].append(reconstructable_reco[has_reconstructable]
+                                          / reconstructable_sim[has_reconstructable])
+
+        mult = simid_multiplicity(chunk["simID"][sim], reco=reco[sim])
+        self.columns["unique_simids"].append(mult.unique_per_event())
+        self.columns["multi_simids"].append(mult.multi_per_event())
+        self._add_multiplicity(np.bincount(mult.count))
+
+    def _add_multiplicity(self, counts):
+        size = max(len(self.particle_multiplicity), len(counts))
+        total = np.zeros(size, dtype=np.int64)
+        total[:len(self.particle_multiplicity)] += self.particle_multiplicity
+        total[:len(counts)] += counts
+        self.particle_multiplicity = total
+
+    def merge(self, other):
+        for name, pieces in self.columns.items():
+            pieces.extend(other.columns[name])
+        self._add_multiplicity(other.particle_multiplicity)
+
+    def as_stats(self):
+        """Statistics in the layout display_statistics expects"""
+        stats = {name: np.concatenate(pieces) if pieces else np.array([])
+                 for name, pieces in self.columns.items()}
+        stats["particle_multiplicity"] = self.particle_multiplicity
+        return stats
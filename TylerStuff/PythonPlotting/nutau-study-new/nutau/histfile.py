@@ -0,0 +1,126 @@
+"""
+Filled histograms on disk, so many jobs can share out a sample and be summed afterwards.
+
+A histogram file is a compressed NumPy .npz archive. For every histogram
+it holds the bin edges, counts and sum of squared weights, stored under
+"<tree>/<name>/...". A JSON header records the booking (expressions and
+selection), the fill statistics, integer counters such as the number of
+events read, and free-form metadata such as the input files.
+"""
+import json
+import os
+import tempfile
+
+import numpy as np
+
+from nutau.booking import HistBook
+
+FORMAT_VERSION = 1
+
+
+def write(path, books, counters=None, metadata=None):
+    """Save filled books (tree name -> HistBook) with counters and metadata to one file"""
+    header = {"version": FORMAT_VERSION, "books": {}, "counters": dict(counters or {}),
+              "metadata": dict(metadata or {})}
+    arrays = {}
+    for tree, book in books.items():
+        header["books"][tree] = {}
+        for name, booking in book.bookings.items():
+            hist = booking.hist
+            key = f"{tree}/{name}"
+            info = {"x": booking.x, "y": booking.y, "selection": booking.selection}
+            if booking.y is None:
+                arrays[f"{key}/edges"] = hist.edges
+                info.update(entries=hist.entries, min=hist.min, max=hist.max,
+                            underflow=hist.underflow, overflow=hist.overflow, nan=hist.nan)
+            else:
+                arrays[f"{key}/xedges"] = hist.xedges
+                arrays[f"{key}/yedges"] = hist.yedges
+            arrays[f"{key}/counts"] = hist.counts
+            arrays[f"{key}/sumw2"] = hist.sumw2
+            header["books"][tree][name] = info
+    arrays["header"] = np.array(json.dumps(header))
+
+    # Write next to the target and rename, so a killed job never leaves half a file behind
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.savez_compressed(f, **arrays)
+        # mkstemp creates owner-only files; give the result the usual permissions
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(tmp_path, 0o666 & ~umask)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def read(path):
+    """Load a histogram file as (books, counters, metadata)"""
+    with np.load(path) as f:
+        header = json.loads(str(f["header"]))
+        if header["version"] != FORMAT_VERSION:
+            raise ValueError(f"{path}: unsupported histogram file version {header['version']}")
+        books = {}
+        for tree, infos in header["books"].items():
+            book = books[tree] = HistBook()
+            for name, info in infos.items():
+                key = f"{tree}/{name}"
+                if info["y"] is None:
+                    edges = f[f"{key}/edges"]
+                    hist = book.book(name, info["x"], len(edges) - 1, (edges[0], edges[-1]),
+                                     selection=info["selection"])
+                    hist.edges = edges
+                    hist.entries, hist.min, hist.max = info["entries"], info["min"], info["max"]
+                    # Files written before under/overflow and NaNs were tracked lack them
+                    hist.underflow, hist.overflow = info.get("underflow", 0), info.get("overflow", 0)
+                    hist.nan = info.get("nan", 0)
+                else:
+                    xedges, yedges = f[f"{key}/xedges"], f[f"{key}/yedges"]
+                    hist = book.book(name, info["x"], (len(xedges) - 1, len(yedges) - 1),
+                                     ((xedges[0], xedges[-1]), (yedges[0], yedges[-1])),
+                                     y=info["y"], selection=info["selection"])
+                    hist.xedges, hist.yedges = xedges, yedges
+                hist.counts = f[f"{key}/counts"]
+    return books, header["counters"], header["metadata"]
+
+
+def _check_compatible(book, other, tree, path):
+    if book.names() != other.names():
+        raise ValueError(f"{path}: histograms of {tree} differ from the first file")
+    for name in book.names():
+        a, b = book[name], other[name]
+        edges = ["edges"] if hasattr(a, "edges") else ["xedges", "yedges"]
+        if not all(np.array_equal(getattr(a, e), getattr(b, e)) for e in edges):
+            raise ValueError(f"{path}: binning of {tree}/{name} differs from the first file")
+
+
+def merge(paths):
+    """
+    Sum histogram files written by separate jobs.
+
+    All files must hold the same histograms with the same binning.
+    Counters are added; the "inputs" metadata lists are concatenated and
+    the rest of the metadata is taken from the first file.
+    """
+    if not paths:
+        raise ValueError("No histogram files to merge")
+    books, counters, metadata = read(paths[0])
+    inputs = list(metadata.get("inputs", []))
+    for path in paths[1:]:
+        other_books, other_counters, other_metadata = read(path)
+        if set(other_books) != set(books):
+            raise ValueError(f"{path}: trees {sorted(other_books)} differ from the first file")
+        for tree, book in books.items():
+            _check_compatible(book, other_books[tree], tree, path)
+            book.merge(other_books[tree])
+        for name, value in other_counters.items():
+            counters[name] = counters.get(name, 0) + value
+        inputs.extend(other_metadata.get("inputs", []))
+    if inputs:
+        metadata["inputs"] = inputs
+    metadata["merged_from"] = list(paths)
+    return books, counters, metadata
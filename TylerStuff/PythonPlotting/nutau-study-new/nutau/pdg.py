@@ -0,0 +1,76 @@
+from functools import lru_cache
+
+import numpy as np
+import particle
+
+# PDG codes that show up in our gen1 samples, looked up once at import
+COMMON_CODES = [
+    11, -11, 12, -12, 13, -13, 14, -14, 15, -15, 16, -16,
+    22, 111, 211, -211, 130, 310, 311, -311, 321, -321, 221,
+    2112, -2112, 2212, -2212, 3122, -3122, 3112, 3212, 3222,
+    1000010020, 1000010030, 1000020030, 1000020040, 1000030060,
+    1000060120, 1000080160, 1000170350, 1000180390, 1000180400,
+    2000000001,
+]
+
+
+@lru_cache(maxsize=4096)
+def lookup(pdg):
+    """(name, charge, mass in MeV) of one PDG code; unknown codes get a placeholder name and NaNs"""
+    try:
+        p = particle.Particle.from_pdgid(pdg)
+    except Exception:
+        return f"PDG {pdg}", np.nan, np.nan
+    mass = p.mass if p.mass is not None else np.nan
+    return p.name, float(p.charge), float(mass)
+
+
+def _build_table(codes):
+    codes = np.unique(np.asarray(codes, dtype=np.int64))
+    rows = [lookup(int(code)) for code in codes]
+    names = np.array([row[0] for row in rows], dtype=object)
+    charges = np.array([row[1] for row in rows], dtype=np.float64)
+    masses = np.array([row[2] for row in rows], dtype=np.float64)
+    return codes, names, charges, masses
+
+
+CODES, NAMES, CHARGES, MASSES = _build_table(COMMON_CODES)
+
+
+def particle_name(pdg):
+    """Readable particle name of one PDG code"""
+    return lookup(int(pdg))[0]
+
+
+def _vectorized(codes, column, table):
+    """Look up a property for an array of PDG codes: table hits by searchsorted, the rest through the LRU cache"""
+    codes = np.asarray(codes, dtype=np.int64)
+    pos = np.clip(np.searchsorted(CODES, codes), 0, len(CODES) - 1)
+    hit = CODES[pos] == codes
+    out = np.empty(codes.shape, dtype=table.dtype)
+    out[hit] = table[pos[hit]]
+    if not hit.all():
+        missing, inverse = np.unique(codes[~hit], return_inverse=True)
+        values = np.array([lookup(int(code))[column] for code in missing], dtype=table.dtype)
+        out[~hit] = values[inverse]
+    return out
+
+
+def names(codes, unknown=None):
+    """Particle names for an array of PDG codes; unknown, e.g. "PDG:{}", formats codes particle doesn't know"""
+    out = _vectorized(codes, 0, NAMES)
+    if unknown is not None:
+        # Unknown codes are the ones looked up with NaN charge
+        missing = np.isnan(charges(codes))
+        out[missing] = [unknown.format(code) for code in np.asarray(codes)[missing]]
+    return out
+
+
+def charges(codes):
+    """Electric charges (units of e) for an array of PDG codes"""
+    return _vectorized(codes, 1, CHARGES)
+
+
+def masses(codes):
+    """Masses in MeV for an array of PDG codes, NaN where unknown"""
+    return _vectorized(codes, 2, MASSES)
@@ -0,0 +1,268 @@
+"""
+Histogram bookings and drawing code of the standard plots.
+
+Each plot comes as a book_* function that registers its histograms in a
+HistBook and a draw_* function that renders them once the book is filled,
+so a driver can book several plots and fill them with one read of the file.
+"""
+import os
+import re
+
+import matplotlib.pyplot as plt
+import numpy as np
+from matplotlib.colors import to_rgb
+from matplotlib.lines import Line2D
+from matplotlib.patches import Patch
+from matplotlib.ticker import AutoMinorLocator
+
+from nutau.booking import HistBook
+from nutau.pdg import particle_name
+from nutau.profiling import stage, timed
+
+
+def book_dedx(book):
+    """dE/dx vs residual range of every ana/tree hit"""
+    book.book("dedx", "hitResRange", y="hitdEdx", bins=(130, 150), range=((0, 130), (0, 15)))
+
+
+@timed()
+def draw_dedx(book, save_name="data/plots-new/dEdx.svg"):
+    hist = book["dedx"]
+    plt.figure(figsize=(8,6))
+    plt.pcolormesh(hist.xedges, hist.yedges, hist.counts.T, cmap='viridis')
+    plt.xlabel("trackResRange [cm]")
+    plt.ylabel("trackdEdx [MeV/cm]")
+    plt.colorbar(label="Counts")
+    plt.xlim(0, 130)
+    plt.ylim(0, 15)
+    with stage("savefig"):
+        plt.savefig(save_name)
+    plt.close()
+
+
+def book_track_score(book, bins=50):
+    """Track score of true muon and true charged pion tracks in ana/tree"""
+    book.book("muon_track_score", "trackScore", bins=bins, range=(0, 1), selection="abs(truePdgCode) == 13")
+    book.book("pion_track_score", "trackScore", bins=bins, range=(0, 1), selection="abs(truePdgCode) == 211")
+
+
+@timed()
+def draw_track_score(book, save_name="data/plots-new/track_score_comparison.svg"):
+    muons, pions = book["muon_track_score"], book["pion_track_score"]
+    plt.figure(figsize=(8,6))
+    plt.stairs(muons.counts, muons.edges, label='Muons')
+    plt.stairs(pions.counts, pions.edges, label='Pions')
+    plt.xlabel("Residual Range [cm]")
+    plt.ylabel("dE/dx [MeV/cm]")
+    plt.legend()
+    plt.xlim(0, 1)
+    with stage("savefig"):
+        plt.savefig(save_name)
+    plt.close()
+
+
+# (histogram name, |PDG| code, label, colour) of the species in the dE/dx comparison
+DEDX_SPECIES = [
+    ("muon_dedx", 13, "Muons", "tab:blue"),
+    ("pion_dedx", 211, "Pions", "tab:orange"),
+]
+
+
+def book_dedx_comparison(book, bins=(130, 150), range=((0, 130), (0, 15))):
+    """dE/dx vs residual range of the hits of true muon and true charged pion tracks"""
+    for name, pdg, _, _ in DEDX_SPECIES:
+        book.book(name, "hitResRange", y="hitdEdx", bins=bins, range=range,
+                  selection=f"abs(truePdgCode) == {pdg}")
+
+
+def _density_image(counts, colour, max_alpha=0.8):
+    """RGBA image of a 2D histogram in one colour, opacity following the log of the bin content"""
+    image = np.zeros(counts.shape + (4,))
+    image[..., :3] = to_rgb(colour)
+    if counts.max() > 0:
+        image[..., 3] = max_alpha * np.log1p(counts) / np.log1p(counts.max())
+    return image
+
+
+def _contour_levels(counts, fractions=(0.9, 0.68, 0.38)):
+    """Bin-content thresholds enclosing the given fractions of all entries, increasing"""
+    values = np.sort(counts.ravel())[::-1]
+    cumulative = np.cumsum(values)
+    if len(values) == 0 or cumulative[-1] == 0:
+        return []
+    levels = values[np.minimum(np.searchsorted(cumulative, np.asarray(fractions) * cumulative[-1]), len(values) - 1)]
+    return np.unique(levels[levels > 0])
+
+
+@timed()
+def draw_dedx_comparison(book, save_name="data/plots-new/dEdx_scatter.png", style="image"):
+    """
+    Overlay the muon and pion dE/dx grids, each species in its own colour.
+
+    style="image" blends one translucent image per species, style="contour"
+    draws lines enclosing 90/68/38% of each species' hits. Either way the
+    cost depends on the grid size only, not on the number of hits.
+    """
+    plt.figure(figsize=(8, 6))
+    handles = []
+    for name, _, label, colour in DEDX_SPECIES:
+        hist = book[name]
+        if style == "contour":
+            xcentres = 0.5 * (hist.xedges[1:] + hist.xedges[:-1])
+            ycentres = 0.5 * (hist.yedges[1:] + hist.yedges[:-1])
+            levels = _contour_levels(hist.counts)
+            if len(levels):
+                plt.contour(xcentres, ycentres, hist.counts.T, levels=levels, colors=colour)
+            handles.append(Line2D([], [], color=colour, label=label))
+        else:
+            plt.imshow(_density_image(hist.counts.T, colour), origin="lower", aspect="auto", interpolation="nearest",
+                       extent=(hist.xedges[0], hist.xedges[-1], hist.yedges[0], hist.yedges[-1]))
+            handles.append(Patch(color=colour, alpha=0.8, label=label))
+
+    plt.xlabel("Residual Range [cm]")
+    plt.ylabel("dE/dx [MeV/cm]")
+    plt.legend(handles=handles)
+    plt.xlim(0, 130)
+    plt.ylim(0, 15)
+    with stage("savefig"):
+        plt.savefig(save_name)
+    plt.close()
+
+
+# (name, expression, axis label, range) of the per-track PID features
+PID_FEATURES = [
+    ("truncated_mean", "truncated_mean(hitdEdx, hitResRange)", "Truncated mean dE/dx [MeV/cm]", (0, 10)),
+    ("end_dedx", "end_dedx(hitdEdx, hitResRange)", "dE/dx in last 5 cm [MeV/cm]", (0, 20)),
+    ("chi2_muon", "chi2_muon(hitdEdx, hitResRange)", "$\\chi^2$/hit vs muon template", (0, 50)),
+    ("chi2_pion", "chi2_pion(hitdEdx, hitResRange)", "$\\chi^2$/hit vs pion template", (0, 50)),
+]
+
+
+def book_pid_features(book, bins=50):
+    """PID feature distributions of true muon and true charged pion tracks"""
+    for feature, expression, _, range in PID_FEATURES:
+        for name, pdg, _, _ in DEDX_SPECIES:
+            book.book(f"{name}_{feature}", expression, bins=bins, range=range,
+                      selection=f"abs(truePdgCode) == {pdg}")
+
+
+@timed()
+def draw_pid_features(book, save_name="data/plots-new/pid_features.png"):
+    fig, axes = plt.subplots(2, 2, figsize=(12, 9))
+    for ax, (feature, _, xlabel, _) in zip(axes.flat, PID_FEATURES):
+        for name, _, label, colour in DEDX_SPECIES:
+            hist = book[f"{name}_{feature}"]
+            ax.stairs(hist.counts, hist.edges, label=label, color=colour)
+        ax.set_xlabel(xlabel)
+        ax.set_ylabel("Tracks")
+        ax.legend()
+    plt.tight_layout()
+    with stage("savefig"):
+        plt.savefig(save_name)
+    plt.close(fig)
+
+
+# Species booked by book_spectra unless others are asked for
+SPECTRUM_SPECIES = [211, -211, 111, 2212, 2112, 13, -13, 22, 11, -11, 321, -321]
+
+
+def spectrum_name(pdg, generation):
+    return f"energy_{pdg}_gen{generation}"
+
+
+def book_spectra(book, pdg_codes=SPECTRUM_SPECIES, generations=(1,), bins=100, range=(0, 5)):
+    """
+    True energy (GeV) of simulated particles of every species and generation
+    in ana/gen1, filled with one (PDG, generation) group-by per chunk.
+    """
+    groups = {spectrum_name(pdg, gen): (pdg, gen) for gen in generations for pdg in pdg_codes}
+    book.book_grouped(groups, "simEnergy", by=("simPdgCode", "simGeneration"),
+                      bins=bins, range=range, selection="sim == 1")
+
+
+# (PDG code, sign, symbol, colour) of the two pion spectra
+PION_SPECTRA = [
+    (-211, "Negative", "$\\pi^-$", "red"),
+    (211, "Positive", "$\\pi^+$", "blue"),
+]
+
+
+def book_pion_spectrum(book, generation=1, bins=100, range=(0, 5)):
+    """True energy (GeV) of simulated charged pions of one generation in ana/gen1"""
+    book_spectra(book, [pdg for pdg, *_ in PION_SPECTRA], (generation,), bins, range)
+
+
+@timed()
+def draw_pion_spectrum(book, save_name="pion_energy_distributions.png", generation=1):
+    # Print some statistics about the results
+    for pdg, sign, _, _ in PION_SPECTRA:
+        hist = book[spectrum_name(pdg, generation)]
+        print(f"Found {hist.entries} {sign.lower()} pions")
+        if hist.entries > 0:
+            print(f"{sign} pion energy range: {hist.min:.2f} to {hist.max:.2f} GeV")
+            # Pions outside the booked range are counted but not drawn
+            if hist.underflow or hist.overflow:
+                print(f"{hist.underflow} {sign.lower()} pions below {hist.edges[0]:g} GeV and "
+                      f"{hist.overflow} above {hist.edges[-1]:g} GeV are not in the plot")
+        else:
+            print(f"No {sign.lower()} pions found")
+
+    # Create a figure with two subplots side by side
+    fig, axes = plt.subplots(1, 2, figsize=(12, 5))
+    for ax, (pdg, sign, symbol, colour) in zip(axes, PION_SPECTRA):
+        hist = book[spectrum_name(pdg, generation)]
+        if hist.entries > 0:
+            # Pre-binned counts drawn as weights on the bin edges so the style matches plt.hist
+            ax.hist(hist.edges[:-1], bins=hist.edges, weights=hist.counts, alpha=0.7, color=colour, edgecolor='black')
+        else:
+            ax.text(0.5, 0.5, f"No {sign.lower()} pions found", ha='center', va='center', transform=ax.transAxes)
+
+        ax.set_title(f"First-Generation {sign} Pions ({symbol})")
+        ax.set_xlabel("Energy (GeV)")
+        ax.set_ylabel("Count")
+        ax.grid(True, alpha=0.3)
+        ax.xaxis.set_minor_locator(AutoMinorLocator())
+        ax.yaxis.set_minor_locator(AutoMinorLocator())
+
+    # Add overall title
+    fig.suptitle("Energy Distribution of First-Generation Pions", fontsize=16)
+    plt.tight_layout()
+    with stage("savefig"):
+        plt.savefig(save_name, dpi=300)
+    plt.close(fig)
+
+
+def sample_name(path):
+    """Neutrino flavour in a gen1 file name, e.g. "mu" for gen1_mu_cc_1000_events_new.root, or "" """
+    match = re.match(r"gen1_([a-z]+)_(cc|nc)_", os.path.basename(path), re.IGNORECASE)
+    return match.group(1) if match else ""
+
+
+# Standard plots: name -> (tree, book function, draw function, output file name; {sample} is "_<flavour>" or "")
+STANDARD_PLOTS = {
+    "dedx": ("ana/tree", book_dedx, draw_dedx, "dEdx.svg"),
+    "track_score": ("ana/tree", book_track_score, draw_track_score, "track_score_comparison.svg"),
+    "dedx_comparison": ("ana/tree", book_dedx_comparison, draw_dedx_comparison, "dEdx_scatter.png"),
+    "pid_features": ("ana/tree", book_pid_features, draw_pid_features, "pid_features.png"),
+    "pion_spectrum": ("ana/gen1", book_pion_spectrum, draw_pion_spectrum, "pion_energy_distributions{sample}.png"),
+}
+
+
+def book_all(trees=("ana/tree", "ana/gen1")):
+    """One HistBook per tree with every standard plot of that tree booked"""
+    books = {tree: HistBook() for tree in trees}
+    for tree, book_plot, _, _ in STANDARD_PLOTS.values():
+        if tree in books:
+            book_plot(books[tree])
+    return books
+
+
+def draw_all(books, out_dir="data/plots-new", sample=""):
+    """Draw every standard plot whose histograms are all present in books, gen1 plots named after the sample"""
+    os.makedirs(out_dir, exist_ok=True)
+    suffix = f"_{sample}" if sample else ""
+    for tree, book_plot, draw_plot, file_name in STANDARD_PLOTS.values():
+        needed = HistBook()
+        book_plot(needed)
+        if tree in books and all(name in books[tree] for name in needed.names()):
+            draw_plot(books[tree], f"{out_dir}/{file_name.format(sample=suffix)}")
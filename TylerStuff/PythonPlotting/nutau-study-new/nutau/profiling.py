@@ -0,0 +1,240 @@
+"""
+Lightweight per-stage timing and memory accounting.
+
+Code marks its stages with the PROFILER context manager or decorator:
+
+    with stage("read"):
+        chunk = next(chunks)
+
+    @timed("plot")
+    def draw(...): ...
+
+Each stage accumulates its number of calls, wall and CPU time (inclusive,
+and exclusive of nested stages), bytes read from ROOT files and the
+process' peak RSS when it finished. The nutau readers, fills and
+plotting code mark their own stages, and the readers note the entries
+and branches read from each (file, tree).
+
+When an analysis script of this directory exits, its stage table is
+written as JSON and CSV to PROFILE_DIR/<script>.profile.*, and in PBS
+jobs (or with NUTAU_RESOURCE_HISTORY set) the run is added to the
+resource history of nutau.resources.
+"""
+import atexit
+import csv
+import json
+import os
+import resource
+import socket
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from uproot.source.futures import TrivialExecutor
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# One JSON line per measured run, read by nutau.resources
+HISTORY = os.environ.get("NUTAU_RESOURCE_HISTORY", os.path.join(REPO_DIR, "jobs", "resource-history.jsonl"))
+
+# Where the stage tables of script runs go, relative to the working directory
+PROFILE_DIR = os.environ.get("NUTAU_PROFILE_DIR", os.path.join("data", "plots-new", "profiles"))
+
+# Runs are only added to the history in PBS jobs or when the history is chosen explicitly (dry runs),
+# not on every interactive run
+RECORD_HISTORY = "PBS_JOBID" in os.environ or "NUTAU_RESOURCE_HISTORY" in os.environ
+
+FIELDS = ("calls", "wall_s", "self_wall_s", "cpu_s", "self_cpu_s", "bytes_read", "max_rss_mb")
+
+
+def max_rss_mb(who=resource.RUSAGE_SELF):
+    """Peak resident set size of this process (or its largest finished child) so far, in MB"""
+    rss = resource.getrusage(who).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return rss / 1e6 if sys.platform == "darwin" else rss * 1024 / 1e6
+
+
+def cpu_seconds():
+    """User + system CPU time of this process and its finished children"""
+    return sum(usage.ru_utime + usage.ru_stime for usage in
+               (resource.getrusage(resource.RUSAGE_SELF), resource.getrusage(resource.RUSAGE_CHILDREN)))
+
+
+class Profiler:
+    """Accumulated statistics per named stage"""
+
+    def __init__(self):
+        self.stages = {}
+        # (file, tree) -> entries read and number of branches
+        self.reads = {}
+        # Largest worker pool used, set by nutau.runner
+        self.workers = 1
+        self.started = time.perf_counter()
+        # Stages nest per thread (nutau.compare streams files on threads), so each thread has its own stack
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def _stats(self, name):
+        return self.stages.setdefault(name, dict.fromkeys(FIELDS, 0))
+
+    @contextmanager
+    def stage(self, name):
+        # (wall, cpu) spent in nested stages, one entry per open stage of this thread
+        children = self._local.__dict__.setdefault("children", [])
+        children.append([0.0, 0.0])
+        # CPU time of this thread only, other threads may be in stages of their own
+        wall, cpu = time.perf_counter(), time.thread_time()
+        try:
+            yield
+        finally:
+            wall, cpu = time.perf_counter() - wall, time.thread_time() - cpu
+            child_wall, child_cpu = children.pop()
+            if children:
+                children[-1][0] += wall
+                children[-1][1] += cpu
+            rss = max_rss_mb()
+            with self._lock:
+                stats = self._stats(name)
+                stats["calls"] += 1
+                stats["wall_s"] += wall
+                stats["self_wall_s"] += wall - child_wall
+                stats["cpu_s"] += cpu
+                stats["self_cpu_s"] += cpu - child_cpu
+                stats["max_rss_mb"] = max(stats["max_rss_mb"], rss)
+
+    def timed(self, name=None):
+        """Decorator running the whole function as one stage, named after it by default"""
+        def decorate(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.stage(name or func.__name__):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def add_bytes(self, name, n_bytes):
+        with self._lock:
+            self._stats(name)["bytes_read"] += n_bytes
+
+    def add_read(self, file_path, tree_name, entries, n_branches, loaded=False):
+        """Note entries read from a tree; loaded=True when they were all held in memory at once"""
+        with self._lock:
+            read = self.reads.setdefault((os.path.abspath(file_path), tree_name),
+                                         {"entries": 0, "branches": 0, "loaded": False})
+            read["entries"] += entries
+            read["branches"] = max(read["branches"], n_branches)
+            read["loaded"] = read["loaded"] or loaded
+
+    def snapshot(self):
+        return {"stages": {name: dict(stats) for name, stats in self.stages.items()},
+                "reads": {key: dict(read) for key, read in self.reads.items()}}
+
+    def reset(self):
+        self.stages = {}
+        self.reads = {}
+
+    def merge(self, snapshot):
+        """Add statistics gathered elsewhere, e.g. the snapshot of a worker process"""
+        for key, other in snapshot["reads"].items():
+            self.add_read(*key, other["entries"], other["branches"], other["loaded"])
+        for name, other in snapshot["stages"].items():
+            stats = self._stats(name)
+            for field in FIELDS:
+                if field == "max_rss_mb":
+                    stats[field] = max(stats[field], other[field])
+                else:
+                    stats[field] += other[field]
+
+    def rows(self):
+        """One dict per stage, slowest (exclusive wall time) first"""
+        return [{"stage": name, **stats} for name, stats in
+                sorted(self.stages.items(), key=lambda item: -item[1]["self_wall_s"])]
+
+    def report(self):
+        """Totals of the run so far plus the stage table"""
+        return {
+            "script": os.path.basename(sys.argv[0]),
+            "args": sys.argv[1:],
+            "wall_s": time.perf_counter() - self.started,
+            "cpu_s": cpu_seconds(),
+            "max_rss_mb": max_rss_mb(),
+            "workers": self.workers,
+            "worker_max_rss_mb": max_rss_mb(resource.RUSAGE_CHILDREN) if self.workers > 1 else 0.0,
+            "reads": [{"file": file_path, "tree": tree_name, **read}
+                      for (file_path, tree_name), read in self.reads.items()],
+            "stages": self.rows(),
+        }
+
+    def write(self, base_path, report=None):
+        """Write <base_path>.profile.json and <base_path>.profile.csv; returns the JSON path"""
+        base = base_path + ".profile"
+        report = report or self.report()
+        os.makedirs(os.path.dirname(os.path.abspath(base)), exist_ok=True)
+        with open(base + ".json", "w") as f:
+            json.dump(report, f, indent=1)
+        with open(base + ".csv", "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=("stage",) + FIELDS)
+            writer.writeheader()
+            writer.writerows(report["stages"])
+        return base + ".json"
+
+
+class StageExecutor(TrivialExecutor):
+    """uproot executor that runs tasks inline, booking their time to a stage (e.g. basket decompression)"""
+
+    def __init__(self, name, profiler=None):
+        self.name = name
+        self.profiler = profiler or PROFILER
+
+    def submit(self, task, /, *args, **kwargs):
+        with self.profiler.stage(self.name):
+            return super().submit(task, *args, **kwargs)
+
+
+# Profiler shared by the nutau helpers and the scripts
+PROFILER = Profiler()
+stage = PROFILER.stage
+timed = PROFILER.timed
+
+
+def record(report, history=HISTORY, sampled=None):
+    """Append the totals of a report to the resource history; sampled is the entry cap of a dry run"""
+    entry = {key: report[key] for key in ("script", "args", "wall_s", "cpu_s", "max_rss_mb",
+                                          "workers", "worker_max_rss_mb", "reads")}
+    entry.update(time=time.strftime("%Y-%m-%dT%H:%M:%S"), host=socket.gethostname(),
+                 sampled=sampled or int(os.environ.get("NUTAU_MAX_ENTRIES", "0")) or None)
+    os.makedirs(os.path.dirname(os.path.abspath(history)), exist_ok=True)
+    with open(history, "a") as f:
+        f.write(json.dumps(entry) + "\n")
+
+
+def write_report(base_path):
+    """Write the stage table of this run to <base_path>.profile.json/.csv, add the run to the history if enabled"""
+    report = PROFILER.report()
+    path = PROFILER.write(base_path, report)
+    print(f"Stage timings written to {path}")
+    if RECORD_HISTORY:
+        try:
+            record(report)
+        except OSError as error:
+            print(f"Could not add the run to the resource history: {error}")
+    return path
+
+
+def report_path():
+    """Base path of the stage table of the running script; PBS array subjobs get one each"""
+    name = os.path.splitext(os.path.basename(sys.argv[0]))[0]
+    if "PBS_JOBID" in os.environ:
+        name += "." + os.environ["PBS_JOBID"]
+    return os.path.join(PROFILE_DIR, name)
+
+
+@atexit.register
+def _report_at_exit():
+    """Report every analysis script run that got as far as profiling something, unless it failed"""
+    script = os.path.realpath(sys.argv[0]) if sys.argv and sys.argv[0] else ""
+    # sys.last_value is set when the script died on an uncaught exception
+    if PROFILER.stages and os.path.dirname(script) == os.path.realpath(REPO_DIR) and not hasattr(sys, "last_value"):
+        write_report(report_path())
@@ -0,0 +1,88 @@
+import os
+
+import awkward as ak
+import uproot
+
+from nutau import cache as nutau_cache
+from nutau.profiling import PROFILER, stage
+from nutau.stream import MAX_ENTRIES
+
+# Branches of ana/gen1 that the analyses actually use
+GEN1_BRANCHES = ("eventID", "sim", "reco", "simID", "simPdgCode", "simGeneration", "simEnergy")
+
+
+def uses_branches(*branches):
+    """Decorator recording which tree branches an analysis function reads"""
+    def decorate(func):
+        func.branches = branches
+        return func
+    return decorate
+
+
+def available_branches(file_path, tree_name):
+    """Names of the top-level branches of a tree, without reading any data"""
+    with uproot.open(file_path) as file:
+        return set(file[tree_name].keys(recursive=False))
+
+
+def tree_bytes(tree, branches=None):
+    """Compressed size in bytes of the given branches (all branches if None)"""
+    names = tree.keys(recursive=False) if branches is None else branches
+    return sum(tree[name].compressed_bytes for name in names)
+
+
+def print_read_report(file_path, tree, branches, bytes_read):
+    """Print how much of the file was read for a projected load"""
+    total_branches = len(tree.keys(recursive=False))
+    total_bytes = tree_bytes(tree)
+    file_size = os.path.getsize(file_path) if os.path.exists(file_path) else None
+    print(f"Read {len(branches)}/{total_branches} branches of {tree.name}: "
+          f"{bytes_read/1e6:.2f} MB of {total_bytes/1e6:.2f} MB compressed "
+          f"({bytes_read/max(1, total_bytes):.1%})", end="")
+    if file_size:
+        print(f", file size {file_size/1e6:.2f} MB")
+    else:
+        print()
+
+
+def load(file_path, tree_name, branches, cut=None, entry_start=None, entry_stop=None, report=True,
+         cache=False):
+    """
+    Read only the listed branches of a tree into an awkward array.
+
+    Branches missing from the file are skipped, so optional branches such
+    as nuPdgCode can be listed and checked for with `name in data.fields`.
+    A cut expression is passed through to uproot and may only select
+    whole entries (e.g. "eventID < 100"). With cache=True the result is
+    kept in the local Parquet cache and later loads skip the ROOT file.
+    """
+    if MAX_ENTRIES is not None:
+        entry_stop = MAX_ENTRIES if entry_stop is None else min(entry_stop, MAX_ENTRIES)
+        entry_start = None if entry_start is None else min(entry_start, entry_stop)
+
+    with stage("read"):
+        if cache and nutau_cache.available():
+            key_parts = [tree_name, sorted(branches), cut, entry_start, entry_stop]
+            read = lambda: iter([_read(file_path, tree_name, branches, cut, entry_start, entry_stop, report)])
+            data = ak.concatenate(list(nutau_cache.cached_chunks(file_path, key_parts, read)))
+        else:
+            data = _read(file_path, tree_name, branches, cut, entry_start, entry_stop, report)
+    # The whole selection is held in memory at once, unlike stream()
+    PROFILER.add_read(file_path, tree_name, len(data), len(data.fields), loaded=True)
+    return data
+
+
+def _read(file_path, tree_name, branches, cut, entry_start, entry_stop, report):
+    with stage("open"):
+        file = uproot.open(file_path)
+    with file:
+        tree = file[tree_name]
+        available = [b for b in branches if b in tree.keys(recursive=False)]
+        source = tree.file.source
+        before = source.num_requested_bytes
+        data = tree.arrays(available, cut=cut, entry_start=entry_start,
+                           entry_stop=entry_stop, library="ak")
+        PROFILER.add_bytes("read", source.num_requested_bytes - before)
+        if report and isinstance(tree, uproot.TTree):
+            print_read_report(file_path, tree, available, source.num_requested_bytes - before)
+    return data
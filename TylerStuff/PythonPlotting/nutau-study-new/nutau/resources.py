@@ -0,0 +1,248 @@
+"""
+PBS resource requests (mem, ncpus, walltime) sized from measured runs.
+
+Every PBS job (or run with NUTAU_RESOURCE_HISTORY set) that reads data
+through nutau appends one line to the resource history (nutau.profiling):
+wall and CPU time, peak RSS of the main process and of its workers, and
+the entries and branches read from each (file, tree). For a new job, the history of its script is fitted
+against the size of the job's input,
+
+    size = sum over the (file, tree) read of entries x branches,
+
+runtime linearly in size and memory linearly in the size of the largest
+block held at once. stream() keeps at most step_size entries of a tree in
+memory, so there memory does not grow with the number of events; trees
+loaded whole by nutau.projection.load count in full. A safety margin is
+added on top. Scripts without a recorded input size get the default
+request. A script without history can be measured with a sampled dry
+run, which runs it on the first entries of each input file in a scratch
+directory.
+
+    python -m nutau.resources estimate 3-dEdx-comparison.py --style contour
+    python -m nutau.resources dry-run 6-pion-spectrum.py "data/gen1_*.root"
+    python -m nutau.resources --shards 16 estimate 8-all-plots.py --tree-file "data/tree_*.root"
+
+submit-job.sh calls these before writing a PBS script.
+"""
+import argparse
+import glob
+import json
+import math
+import os
+import shlex
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import uproot
+
+from nutau.profiling import HISTORY, record
+from nutau.runner import DEFAULT_ENTRIES_PER_TASK, expand_files
+from nutau.stream import DEFAULT_STEP_SIZE
+
+# Request used when a script has never been measured (the old fixed request of submit-job.sh)
+DEFAULT_REQUEST = {"ncpus": 1, "mem_gb": 32, "walltime_s": 3600}
+
+# Estimates are multiplied by these before rounding up
+MEMORY_MARGIN = 1.5
+TIME_MARGIN = 1.5
+
+MIN_MEM_GB = 1
+MIN_WALLTIME_S = 600
+MAX_NCPUS = 8
+
+# Entries per file of the two dry runs; two sizes give a slope as well as an offset
+DRY_RUN_ENTRIES = (2000, 8000)
+
+
+def load(script, history=HISTORY):
+    """History records of a script (by file name), oldest first"""
+    if not os.path.exists(history):
+        return []
+    with open(history) as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    return [r for r in records if r["script"] == os.path.basename(script)]
+
+
+def parse_command(command):
+    """Script and arguments of a python command, given as one string or as tokens"""
+    tokens = shlex.split(command[0]) if len(command) == 1 else list(command)
+    if tokens and os.path.basename(tokens[0]).startswith("python"):
+        tokens = tokens[1:]
+    if not tokens:
+        raise ValueError("No script in the command")
+    return tokens[0], tokens[1:]
+
+
+def _split_path(arg):
+    """
+    (prefix, path) of an argument naming existing ROOT files, path possibly
+    a glob pattern, or None. A "label=" prefix such as in the sample
+    arguments of 7-compare-samples.py is split off.
+    """
+    for prefix, path in [("", arg), (arg.partition("=")[0] + "=", arg.partition("=")[2])]:
+        if path.endswith(".root") and glob.glob(path):
+            return prefix, path
+    return None
+
+
+def input_files(args):
+    """Existing ROOT files named by the arguments of a command, globs expanded, each once"""
+    paths = [split[1] for split in map(_split_path, args) if split]
+    return list(dict.fromkeys(os.path.abspath(path) for path in expand_files(paths)))
+
+
+def job_reads(records, args):
+    """
+    (file, tree) reads a new job will do: the trees and branch counts of the
+    script's last run, over the ROOT files in the arguments (or, without
+    any, the files of that run) with their full number of entries.
+    """
+    last = records[-1]["reads"]
+    branches, loaded = {}, {}
+    for read in last:
+        branches[read["tree"]] = max(branches.get(read["tree"], 0), read["branches"])
+        loaded[read["tree"]] = loaded.get(read["tree"], False) or read.get("loaded", False)
+    files = input_files(args) or list(dict.fromkeys(read["file"] for read in last))
+    reads = []
+    for file_path in files:
+        with uproot.open(file_path) as file:
+            for tree_name, n_branches in branches.items():
+                if tree_name in file:
+                    reads.append({"file": file_path, "tree": tree_name, "entries": file[tree_name].num_entries,
+                                  "branches": n_branches, "loaded": loaded[tree_name]})
+    return reads
+
+
+def sizes(reads):
+    """(entries x branches in total, entries x branches of the largest block in memory, worker tasks of the largest tree)"""
+    size = sum(r["entries"] * r["branches"] for r in reads)
+    # Streamed trees hold one chunk at a time, loaded ones everything
+    chunk = max(((r["entries"] if r.get("loaded") else min(r["entries"], DEFAULT_STEP_SIZE)) * r["branches"]
+                 for r in reads), default=0)
+    tasks = {}
+    for r in reads:
+        tasks[r["tree"]] = tasks.get(r["tree"], 0) + math.ceil(r["entries"] / DEFAULT_ENTRIES_PER_TASK)
+    return size, chunk, max(tasks.values(), default=1)
+
+
+def _fit(xs, ys, x):
+    """
+    Straight-line estimate of y at x from measured (x, y) pairs.
+
+    With a single measured size y is scaled in proportion above it (and the
+    largest y is kept below it); the slope is never negative.
+    """
+    xs, ys = np.asarray(xs, dtype=np.float64), np.asarray(ys, dtype=np.float64)
+    if len(np.unique(xs)) < 2:
+        largest = xs.max()
+        return ys.max() * (x / largest if x > largest > 0 else 1.0)
+    slope, offset = np.polyfit(xs, ys, 1)
+    if slope <= 0:
+        return ys.max()
+    return max(offset + slope * x, ys.min())
+
+
+def core_seconds(r):
+    """CPU-bound time of a run summed over the cores it kept busy"""
+    busy = min(r["workers"], r["cpu_s"] / r["wall_s"]) if r["wall_s"] > 0 else 1
+    return r["wall_s"] * max(1.0, busy)
+
+
+def estimate(command, history=HISTORY, max_ncpus=MAX_NCPUS, shards=1):
+    """
+    Resource request for a python command: dict of ncpus, mem_gb, walltime_s and
+    basis, a line describing what it was derived from.
+
+    With shards > 1 the request is for one job of an array that splits the
+    command's input into that many equal shares.
+    """
+    script, args = parse_command(command)
+    # Runs that read nothing through nutau give no input size to scale from
+    records = [r for r in load(script, history) if r["reads"]]
+    if not records:
+        return {**DEFAULT_REQUEST,
+                "basis": f"no history with input sizes for {os.path.basename(script)}, using the default request"}
+
+    size, chunk, tasks = sizes(job_reads(records, args))
+    size, tasks = math.ceil(size / shards), math.ceil(tasks / shards)
+    measured = [sizes(r["reads"]) for r in records]
+    # Scripts that ran workers get one core per task, as nutau.runner uses NCPUS workers under PBS
+    parallel = any(r["workers"] > 1 for r in records)
+    ncpus = max(1, min(max_ncpus, tasks)) if parallel else 1
+
+    core_s = _fit([m[0] for m in measured], [core_seconds(r) for r in records], size)
+    main_mb = _fit([m[1] for m in measured], [r["max_rss_mb"] for r in records], chunk)
+    worker_mb = _fit([m[1] for m in measured], [r["worker_max_rss_mb"] for r in records], chunk) if parallel else 0.0
+
+    walltime_s = max(MIN_WALLTIME_S, math.ceil(core_s / ncpus * TIME_MARGIN / 300) * 300)
+    mem_gb = max(MIN_MEM_GB, math.ceil((main_mb + ncpus * worker_mb) * MEMORY_MARGIN / 1000))
+    basis = (f"{len(records)} measured runs of {os.path.basename(script)}; input {size:,} entries x branches, "
+             f"~{core_s:.0f} core-s, ~{main_mb + ncpus * worker_mb:.0f} MB")
+    return {"ncpus": ncpus, "mem_gb": mem_gb, "walltime_s": walltime_s, "basis": basis}
+
+
+def walltime(seconds):
+    """Seconds as a PBS HH:MM:SS walltime"""
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+def _measure(script, args, entries, scratch):
+    """Run a script on the first `entries` entries of each file; returns (status, wall_s, rusage)"""
+    env = dict(os.environ, NUTAU_MAX_ENTRIES=str(entries),
+               NUTAU_RESOURCE_HISTORY=os.path.join(scratch, "history.jsonl"))
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, os.path.abspath(script), *args], cwd=scratch, env=env)
+    _, status, usage = os.wait4(process.pid, 0)
+    return os.waitstatus_to_exitcode(status), time.perf_counter() - start, usage
+
+
+def dry_run(command, entries=DRY_RUN_ENTRIES, history=HISTORY):
+    """
+    Measure a script on samples of its input and add the runs to the history.
+
+    Each sample size runs in a scratch directory (plots included), with ROOT
+    file arguments made absolute. Wall time, CPU time and peak RSS are
+    measured from outside; what was read comes from the record
+    nutau.profiling writes when the script exits.
+    """
+    script, args = parse_command(command)
+    # Input paths are made absolute for the scratch directory; patterns stay patterns for the script to expand
+    args = [split[0] + os.path.abspath(split[1]) if split else a for a, split in zip(args, map(_split_path, args))]
+    for n in entries:
+        scratch = tempfile.mkdtemp(prefix="nutau-dry-run-")
+        try:
+            os.makedirs(os.path.join(scratch, "data", "plots-new"))
+            print(f"Dry run of {os.path.basename(script)} on up to {n:,} entries per file")
+            code, wall_s, usage = _measure(script, args, n, scratch)
+            if code != 0:
+                raise RuntimeError(f"{script} exited with status {code} in the dry run")
+            reported = load(script, os.path.join(scratch, "history.jsonl"))
+            report = reported[-1] if reported else {"script": os.path.basename(script), "args": args, "workers": 1,
+                                                    "worker_max_rss_mb": 0.0, "max_rss_mb": 0.0, "reads": []}
+            # ru_maxrss of a waited-for child is in kilobytes on Linux
+            report.update(wall_s=wall_s, cpu_s=usage.ru_utime + usage.ru_stime,
+                          max_rss_mb=max(report["max_rss_mb"], usage.ru_maxrss * 1024 / 1e6))
+            record(report, history, sampled=n)
+        finally:
+            shutil.rmtree(scratch, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Size PBS requests from measured peak memory and runtime")
+    parser.add_argument("action", choices=["estimate", "dry-run"],
+                        help="Print 'ncpus mem walltime' for a command, or measure it on a sample first")
+    parser.add_argument("command", nargs=argparse.REMAINDER, help="Python script and its arguments")
+    parser.add_argument("--history", default=HISTORY, help="Resource history file")
+    parser.add_argument("--max-ncpus", type=int, default=MAX_NCPUS, help="Most cores requested for one job")
+    parser.add_argument("--shards", type=int, default=1, help="Size one job of an array splitting the input this many ways")
+    args = parser.parse_args()
+
+    if args.action == "dry-run":
+        dry_run(args.command, history=args.history)
+    request = estimate(args.command, args.history, args.max_ncpus, args.shards)
+    print(request["basis"], file=sys.stderr)
+    print(request["ncpus"], f"{request['mem_gb']}gb", walltime(request["walltime_s"]))
@@ -0,0 +1,156 @@
+import copy
+import glob
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import uproot
+
+from nutau.profiling import PROFILER, stage
+from nutau.stream import DEFAULT_STEP_SIZE, MAX_ENTRIES, stream
+
+# Entries handed to one worker at a time
+DEFAULT_ENTRIES_PER_TASK = 50000
+
+
+def expand_files(paths):
+    """Turn a path, glob pattern or list of either into a sorted list of files"""
+    if isinstance(paths, str):
+        paths = [paths]
+    files = []
+    for path in paths:
+        matches = sorted(glob.glob(path))
+        files.extend(matches if matches else [path])
+    return files
+
+
+def default_workers():
+    """Number of worker processes: NCPUS under PBS, otherwise every core on the node"""
+    return int(os.environ.get("NCPUS", os.cpu_count() or 1))
+
+
+def _num_entries(file_path, tree_name):
+    with uproot.open(file_path) as file:
+        n_entries = file[tree_name].num_entries
+    if MAX_ENTRIES is not None:
+        n_entries = min(n_entries, MAX_ENTRIES)
+    return n_entries
+
+
+def make_tasks(files, tree_name, entries_per_task=DEFAULT_ENTRIES_PER_TASK):
+    """Split every file into (file_path, entry_start, entry_stop) ranges"""
+    tasks = []
+    for file_path in files:
+        n_entries = _num_entries(file_path, tree_name)
+        for start in range(0, n_entries, entries_per_task):
+            tasks.append((file_path, start, min(start + entries_per_task, n_entries)))
+    return tasks
+
+
+def shard_ranges(files, tree_name, index, n_shards):
+    """
+    The (file_path, entry_start, entry_stop) ranges of shard `index` out of n_shards.
+
+    The entries of all files, taken in order, are cut into n_shards nearly
+    equal contiguous slices, so shards are balanced whether the sample is
+    one large file or many small ones.
+    """
+    if not 0 <= index < n_shards:
+        raise ValueError(f"Shard index {index} is outside 0-{n_shards - 1}")
+    counts = [_num_entries(file_path, tree_name) for file_path in files]
+    total = sum(counts)
+    first, last = total * index // n_shards, total * (index + 1) // n_shards
+    ranges, offset = [], 0
+    for file_path, n_entries in zip(files, counts):
+        start, stop = max(first - offset, 0), min(last - offset, n_entries)
+        if start < stop:
+            ranges.append((file_path, start, stop))
+        offset += n_entries
+    return ranges
+
+
+def _run_task(args):
+    """
+    Worker body: fill a private copy of the accumulators over one entry range.
+
+    Returns the filled accumulators with the profile (stage timings and
+    reads) of this task only, so it can be added to the parent's profile.
+    """
+    (file_path, entry_start, entry_stop), tree_name, accumulators, step_size, cache = args
+    earlier = PROFILER.snapshot()
+    PROFILER.reset()
+    partial = stream(file_path, tree_name, copy.deepcopy(accumulators), step_size=step_size,
+                     entry_start=entry_start, entry_stop=entry_stop, cache=cache)
+    profile = PROFILER.snapshot()
+    PROFILER.reset()
+    PROFILER.merge(earlier)
+    return partial, profile
+
+
+def merge_into(accumulators, partials):
+    """Merge lists of partial accumulators into the given ones, position by position"""
+    for partial in partials:
+        with stage("merge"):
+            for acc, other in zip(accumulators, partial):
+                acc.merge(other)
+    return accumulators
+
+
+def _map_tasks(jobs, n_workers):
+    """Run worker jobs inline or in a process pool, yielding results in job order"""
+    n_workers = min(n_workers or default_workers(), max(1, len(jobs)))
+    if n_workers == 1:
+        yield from map(_run_task, jobs)
+        return
+
+    # Fork where available so module-level script code is not re-run in workers
+    context = None
+    if "fork" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("fork")
+    PROFILER.workers = max(PROFILER.workers, n_workers)
+    with ProcessPoolExecutor(max_workers=n_workers, mp_context=context) as pool:
+        yield from pool.map(_run_task, jobs)
+
+
+def _collect(results):
+    """Add the workers' profiles (summed over processes) to this process' profile, yielding the accumulators"""
+    for partial, profile in results:
+        PROFILER.merge(profile)
+        yield partial
+
+
+def run_dataset(paths, tree_name, accumulators, n_workers=None,
+                entries_per_task=DEFAULT_ENTRIES_PER_TASK, step_size=DEFAULT_STEP_SIZE, cache=False):
+    """
+    Fill accumulators over many files using a process pool on this node.
+
+    Each task gets its own copy of the (empty) accumulators, fills it
+    over one entry range, and the partial results are merged back into the
+    accumulators that were passed in.
+    """
+    tasks = make_tasks(expand_files(paths), tree_name, entries_per_task)
+    # Jobs are pickled lazily by the pool, so they must not share the objects results are merged into
+    template = copy.deepcopy(accumulators)
+    jobs = [(task, tree_name, template, step_size, cache) for task in tasks]
+    return merge_into(accumulators, _collect(_map_tasks(jobs, n_workers)))
+
+
+def run_samples(samples, tree_name, make_accumulators, n_workers=None,
+                entries_per_task=DEFAULT_ENTRIES_PER_TASK, step_size=DEFAULT_STEP_SIZE, cache=False):
+    """
+    Fill one set of accumulators per labelled sample in a single pool.
+
+    samples maps a label to a path, glob or list of files. Entry ranges of
+    all samples are interleaved in one pool so every core stays busy until
+    the last sample is done. Returns a dict of label -> accumulators.
+    """
+    results = {label: make_accumulators() for label in samples}
+    labels, jobs = [], []
+    for label, paths in samples.items():
+        template = make_accumulators()
+        for task in make_tasks(expand_files(paths), tree_name, entries_per_task):
+            labels.append(label)
+            jobs.append((task, tree_name, template, step_size, cache))
+    for label, partial in zip(labels, _collect(_map_tasks(jobs, n_workers))):
+        merge_into(results[label], [partial])
+    return results
@@ -0,0 +1,61 @@
+import awkward as ak
+import numpy as np
+
+from nutau.counting import aggregate
+
+
+class SimIDMultiplicity:
+    """
+    Number of particles (and reconstructed particles) sharing each simID.
+
+    One row per (event, simID) pair, sorted by event then simID.
+    """
+
+    def __init__(self, event, sim_id, count, reco_count, n_events):
+        self.event = event
+        self.sim_id = sim_id
+        self.count = count
+        self.reco_count = reco_count
+        self.n_events = n_events
+
+    @property
+    def multi(self):
+        """Mask of simIDs carried by more than one particle"""
+        return self.count > 1
+
+    def unique_per_event(self):
+        return np.bincount(self.event, minlength=self.n_events)
+
+    def multi_per_event(self):
+        return np.bincount(self.event[self.multi], minlength=self.n_events)
+
+
+def simid_multiplicity(sim_ids, reco=None, ignore=None):
+    """
+    Count particles per simID for one event (flat array) or every event
+    of a jagged array at once, with a single sort over all particles.
+
+    reco is an optional boolean array shaped like sim_ids; simIDs equal
+    to `ignore` (e.g. -1 for particles without a simID) are dropped.
+    """
+    if isinstance(sim_ids, ak.Array) and sim_ids.ndim > 1:
+        n_events = len(sim_ids)
+        event = np.repeat(np.arange(n_events), ak.to_numpy(ak.num(sim_ids)))
+        ids = ak.to_numpy(ak.flatten(sim_ids))
+        reco = ak.to_numpy(ak.flatten(reco)) if reco is not None else None
+    else:
+        n_events = 1
+        ids = np.asarray(sim_ids)
+        event = np.zeros(len(ids), dtype=np.int64)
+        reco = np.asarray(reco) if reco is not None else None
+
+    if reco is None:
+        reco = np.zeros(len(ids), dtype=bool)
+    if ignore is not None:
+        keep = ids != ignore
+        ids, event, reco = ids[keep], event[keep], reco[keep]
+
+    keys = np.stack([event, ids], axis=1).astype(np.int64)
+    weights = np.stack([np.ones(len(ids), dtype=np.int64), reco.astype(np.int64)], axis=1)
+    keys, sums = aggregate(keys, weights)
+    return SimIDMultiplicity(keys[:, 0], keys[:, 1], sums[:, 0], sums[:, 1], n_events)
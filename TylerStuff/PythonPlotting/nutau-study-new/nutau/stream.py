@@ -0,0 +1,83 @@
+import os
+
+import uproot
+
+from nutau import cache as nutau_cache
+from nutau.profiling import PROFILER, StageExecutor, stage
+
+# Number of tree entries (events) decoded at a time
+DEFAULT_STEP_SIZE = 10000
+
+# Read at most this many entries of each file; set for the sampled dry runs of nutau.resources
+MAX_ENTRIES = int(os.environ.get("NUTAU_MAX_ENTRIES", "0")) or None
+
+
+def _requested_bytes(tree):
+    return getattr(tree.file.source, "num_requested_bytes", 0)
+
+
+def _read_chunks(file_path, tree_name, branches, step_size, entry_start, entry_stop):
+    with stage("open"):
+        file = uproot.open(file_path)
+    # Closed when the chunks are exhausted or the generator is dropped, not left to the garbage collector
+    with file:
+        tree = file[tree_name]
+        before = _requested_bytes(tree)
+        for chunk in tree.iterate(
+            list(branches),
+            step_size=step_size,
+            entry_start=entry_start,
+            entry_stop=entry_stop,
+            library="ak",
+            # TTree baskets are decompressed and interpreted through these, so their time is booked separately
+            decompression_executor=StageExecutor("decompress"),
+            interpretation_executor=StageExecutor("interpret"),
+        ):
+            after = _requested_bytes(tree)
+            PROFILER.add_bytes("read", after - before)
+            before = after
+            yield chunk
+
+
+def iterate_chunks(file_path, tree_name, branches, step_size=DEFAULT_STEP_SIZE,
+                   entry_start=None, entry_stop=None, cache=False):
+    """
+    Yield awkward arrays of fixed-size entry chunks from one tree.
+
+    With cache=True the selection is served from (or converted into) the
+    local Parquet cache in nutau.cache instead of being decompressed from
+    the ROOT file again.
+    """
+    if MAX_ENTRIES is not None:
+        entry_stop = MAX_ENTRIES if entry_stop is None else min(entry_stop, MAX_ENTRIES)
+        entry_start = None if entry_start is None else min(entry_start, entry_stop)
+
+    def read():
+        return _read_chunks(file_path, tree_name, branches, step_size, entry_start, entry_stop)
+
+    if cache and nutau_cache.available():
+        key_parts = [tree_name, sorted(branches), entry_start, entry_stop]
+        return nutau_cache.cached_chunks(file_path, key_parts, read)
+    return read()
+
+
+def stream(file_path, tree_name, accumulators, step_size=DEFAULT_STEP_SIZE,
+           entry_start=None, entry_stop=None, cache=False):
+    """
+    Feed every chunk of a tree to a list of accumulators.
+
+    Only the union of the branches the accumulators ask for is read, and
+    peak memory is set by step_size rather than by the size of the file.
+    """
+    branches = sorted({b for acc in accumulators for b in acc.branches})
+    chunks = iterate_chunks(file_path, tree_name, branches, step_size, entry_start, entry_stop, cache)
+    while True:
+        with stage("read"):
+            chunk = next(chunks, None)
+        if chunk is None:
+            break
+        PROFILER.add_read(file_path, tree_name, len(chunk), len(branches))
+        for acc in accumulators:
+            with stage(f"fill {type(acc).__name__}"):
+                acc.fill(chunk)
+    return accumulators
@@ -0,0 +1,163 @@
+"""
+Synthetic ana/gen1 and ana/tree files for testing and benchmarking off-cluster.
+
+The branches follow AnalyseEvents_module.cc / AnalyseEvents_module2.cc and
+what the analysis scripts read; the contents are random but shaped like
+neutrino interactions: a handful of primaries and secondaries per event,
+energy-dependent reconstruction, tracks with Bragg-peaked dE/dx and track
+scores that separate tracks from showers. Files are reproducible for a
+given seed and written in batches, so any size fits in memory.
+
+ana/gen1 is written as a TTree. uproot cannot write the doubly jagged
+hitdEdx/hitResRange branches of ana/tree into a TTree, so that tree is
+written as an RNTuple, which uproot reads through the same interface.
+
+    python -m nutau.synthetic data/synthetic/events_1k.root --events 1000
+"""
+import argparse
+import os
+
+import awkward as ak
+import numpy as np
+import uproot
+
+from nutau.pid import MUON_MASS, PION_MASS, PROTON_MASS, bragg_template
+
+# Particle mix of gen1: PDG code -> (relative rate, mass in GeV)
+GEN1_SPECIES = {
+    13: (1.0, 0.10566), -13: (0.1, 0.10566), 11: (0.4, 0.000511), -11: (0.1, 0.000511),
+    211: (0.9, 0.13957), -211: (0.6, 0.13957), 111: (0.8, 0.13498), 2212: (1.6, 0.93827),
+    2112: (1.4, 0.93957), 22: (1.2, 0.0), 321: (0.05, 0.49368), 14: (0.3, 0.0),
+    1000180400: (0.3, 37.2155), 2000000001: (0.2, 0.0), 1000010020: (0.05, 1.8756),
+}
+
+# Neutral or unstable species the reconstruction never finds
+NEVER_RECONSTRUCTED = {111, 2112, 22, 14, 1000180400, 2000000001}
+
+# True species of ana/tree tracks: PDG code -> (relative rate, mass in MeV)
+TRACK_SPECIES = {
+    13: (1.0, MUON_MASS), -13: (0.1, MUON_MASS), 211: (0.6, PION_MASS), -211: (0.4, PION_MASS),
+    2212: (0.9, PROTON_MASS), 11: (0.5, 0.511), 0: (0.1, MUON_MASS),
+}
+
+# Most probable dE/dx of a minimum ionising particle in argon, MeV/cm
+MIP_DEDX = 2.1
+
+
+def _choose(rng, table, n):
+    codes = np.array(list(table), dtype=np.int64)
+    rates = np.array([v[0] for v in table.values()], dtype=np.float64)
+    return rng.choice(codes, size=n, p=rates / rates.sum())
+
+
+def _positions(codes, table):
+    """Row of each code in a species table"""
+    keys = np.array(list(table), dtype=np.int64)
+    order = np.argsort(keys)
+    return order[np.searchsorted(keys[order], codes)]
+
+
+def gen1_batch(rng, n_events, first_event=0, particles_per_event=12.0):
+    """One batch of ana/gen1 entries as a dict of (jagged) arrays"""
+    counts = rng.poisson(particles_per_event, n_events) + 1
+    n = int(counts.sum())
+    pdg = _choose(rng, GEN1_SPECIES, n)
+    mass = np.array([v[1] for v in GEN1_SPECIES.values()])[_positions(pdg, GEN1_SPECIES)]
+    energy = mass + rng.exponential(0.4, n)
+    generation = np.minimum(rng.geometric(0.55, n), 4).astype(np.int32)
+    sim = (rng.random(n) < 0.97).astype(np.int32)
+    # Reconstruction efficiency rises with kinetic energy, and is zero for neutral/unstable species
+    efficiency = 0.9 * (1 - np.exp(-(energy - mass) / 0.08))
+    reconstructable = ~np.isin(np.abs(pdg), list(NEVER_RECONSTRUCTED))
+    reco = (sim.astype(bool) & reconstructable & (rng.random(n) < efficiency)).astype(np.int32)
+    # Particles mostly carry their own simID; some share one and a few have none
+    index = np.arange(n) - np.repeat(np.cumsum(counts) - counts, counts)
+    sim_id = np.where(rng.random(n) < 0.1, np.maximum(index - 1, 0), index)
+    sim_id = np.where(rng.random(n) < 0.03, -1, sim_id).astype(np.int32)
+    return {
+        "eventID": np.arange(first_event, first_event + n_events, dtype=np.int32),
+        "sim": ak.unflatten(sim, counts),
+        "reco": ak.unflatten(reco, counts),
+        "simID": ak.unflatten(sim_id, counts),
+        "simPdgCode": ak.unflatten(pdg.astype(np.int32), counts),
+        "simGeneration": ak.unflatten(generation, counts),
+        "simEnergy": ak.unflatten(energy, counts),
+    }
+
+
+def tree_batch(rng, n_events, first_event=0, tracks_per_event=3.0, pitch=1.0):
+    """One batch of ana/tree entries as a dict of (doubly) jagged arrays"""
+    n_tracks = rng.poisson(tracks_per_event, n_events)
+    n = int(n_tracks.sum())
+    pdg = _choose(rng, TRACK_SPECIES, n)
+    rows = _positions(pdg, TRACK_SPECIES)
+    mass = np.array([v[1] for v in TRACK_SPECIES.values()])[rows]
+    length = np.clip(rng.exponential(40.0, n), pitch, 400.0)
+    is_track = np.abs(pdg) != 11
+    score = np.where(is_track, rng.beta(5, 2, n), rng.beta(1.5, 5, n))
+    score = np.where(np.abs(pdg) == 211, rng.beta(3, 2.5, n), score)
+
+    # Hits every `pitch` cm from the start of the track to its end
+    n_hits = np.maximum((length / pitch).astype(np.int64), 1)
+    track = np.repeat(np.arange(n), n_hits)
+    step = np.arange(n_hits.sum()) - np.repeat(np.cumsum(n_hits) - n_hits, n_hits)
+    res_range = (n_hits[track] - step - rng.random(len(step))) * pitch
+    res_range = np.maximum(res_range, 0.05)
+    expected = np.maximum(bragg_template(res_range, mass[track]), MIP_DEDX)
+    # Showers deposit a flat, noisier dE/dx; Landau-like fluctuations everywhere
+    expected = np.where(is_track[track], expected, 2 * MIP_DEDX)
+    dedx = expected * rng.gamma(8.0, 1 / 8.0, len(step)) + rng.exponential(0.15, len(step))
+    dedx[rng.random(len(step)) < 0.01] = np.nan
+
+    true_energy = np.where(pdg == 0, np.nan, (mass + rng.exponential(300.0, n)) / 1000)
+    return {
+        "eventID": np.arange(first_event, first_event + n_events, dtype=np.uint32),
+        "nPFParticles": (n_tracks + rng.poisson(1.0, n_events)).astype(np.uint32),
+        "nDaughters": n_tracks.astype(np.uint32),
+        "trackId": ak.unflatten(np.where(pdg == 0, -1, np.arange(n)).astype(np.int32), n_tracks),
+        "trackLength": ak.unflatten(length.astype(np.float32), n_tracks),
+        "trackScore": ak.unflatten(score.astype(np.float32), n_tracks),
+        "hitdEdx": ak.unflatten(ak.unflatten(dedx.astype(np.float32), n_hits), n_tracks),
+        "hitResRange": ak.unflatten(ak.unflatten(res_range.astype(np.float32), n_hits), n_tracks),
+        "truePdgCode": ak.unflatten(pdg.astype(np.int32), n_tracks),
+        "trueEnergy": ak.unflatten(true_energy.astype(np.float32), n_tracks),
+    }
+
+
+def _branch_types(batch):
+    return {name: values.dtype if isinstance(values, np.ndarray) else f"var * {ak.type(values).content.content}"
+            for name, values in batch.items()}
+
+
+def write(path, n_events, seed=1, batch_size=20000, gen1=True, tree=True):
+    """Write a synthetic file with ana/gen1 and/or ana/tree of n_events entries each"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    rng = np.random.default_rng(seed)
+    with uproot.recreate(path) as f:
+        for start in range(0, n_events, batch_size):
+            size = min(batch_size, n_events - start)
+            if gen1:
+                batch = gen1_batch(rng, size, start)
+                if start == 0:
+                    f.mktree("ana/gen1", _branch_types(batch))
+                f["ana/gen1"].extend(batch)
+            if tree:
+                batch = tree_batch(rng, size, start)
+                if start == 0:
+                    f["ana/tree"] = batch
+                else:
+                    f["ana/tree"].extend(batch)
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write a synthetic ana/gen1 + ana/tree ROOT file")
+    parser.add_argument("output", help="ROOT file to write")
+    parser.add_argument("--events", type=int, default=1000, help="Number of events per tree")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed; the same seed gives the same file")
+    parser.add_argument("--batch-size", type=int, default=20000, help="Events generated and written at a time")
+    parser.add_argument("--no-gen1", action="store_true", help="Skip ana/gen1")
+    parser.add_argument("--no-tree", action="store_true", help="Skip ana/tree")
+    args = parser.parse_args()
+    write(args.output, args.events, args.seed, args.batch_size, not args.no_gen1, not args.no_tree)
+    print(f"Wrote {args.events} synthetic events to {args.output}")
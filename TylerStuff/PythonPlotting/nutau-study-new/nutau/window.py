@@ -0,0 +1,62 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import uproot
+
+# Events decoded per window
+DEFAULT_WINDOW = 100
+
+
+class WindowedReader:
+    """
+    Random access to single events of a tree through cached windows.
+
+    The file is opened once. Events are decoded a window at a time, and
+    the windows either side of the one being read are fetched on a
+    background thread so stepping across a window boundary is instant.
+
+    The caller and the prefetcher share one uproot file handle, which is
+    not safe to use from two threads at once. This works only because
+    every read, including the one event() waits for, is submitted to the
+    same single-worker executor: keep max_workers=1 and never read from
+    self.tree outside _read.
+    """
+
+    def __init__(self, file_path, tree_name, branches, window=DEFAULT_WINDOW):
+        self.file_path = file_path
+        self.branches = list(branches)
+        self.window = window
+        self.file = uproot.open(file_path)
+        self.tree = self.file[tree_name]
+        self.num_entries = self.tree.num_entries
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.windows = {}
+
+    def _read(self, start):
+        stop = min(start + self.window, self.num_entries)
+        return self.tree.arrays(self.branches, entry_start=start, entry_stop=stop, library="ak")
+
+    def _fetch(self, start):
+        if start not in self.windows:
+            self.windows[start] = self.executor.submit(self._read, start)
+        return self.windows[start]
+
+    def event(self, index):
+        """A length-1 awkward array holding entry `index`"""
+        start = index - index % self.window
+        data = self._fetch(start).result()
+
+        # Prefetch the neighbouring windows and forget everything further away
+        keep = {start}
+        for neighbour in (start - self.window, start + self.window):
+            if 0 <= neighbour < self.num_entries:
+                self._fetch(neighbour)
+                keep.add(neighbour)
+        for old in set(self.windows) - keep:
+            del self.windows[old]
+
+        offset = index - start
+        return data[offset:offset + 1]
+
+    def close(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        self.file.close()
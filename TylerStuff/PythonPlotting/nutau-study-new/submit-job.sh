@@ -1,9 +1,29 @@
 #!/bin/bash
 
+# Options: python jobs get mem/ncpus/walltime sized from the resource history of their script
+# (nutau/resources.py); --dry-run measures the script on a sample of its input first,
+# --fixed keeps the old fixed request.
+# --shards N splits the input of a script that takes --shard/--save-hists (8-all-plots.py) into
+# N slices run as one PBS array job, followed by a job that merges them and draws the plots
+size_resources=1
+dry_run=0
+shards=1
+while [[ "$1" == --* ]]; do
+    case "$1" in
+        --dry-run) dry_run=1 ;;
+        --fixed) size_resources=0 ;;
+        --shards) shards="$2"; shift ;;
+        *) echo "Unknown option $1"; exit 1 ;;
+    esac
+    shift
+done
+
 # Usage check
 if [ "$#" -ne 5 ]; then
-    echo "Usage: ./submit_job.sh <script_path> <command> <run_number> <event_type> <macro_name>"
+    echo "Usage: ./submit_job.sh [--dry-run|--fixed] [--shards N] <script_path> <command> <run_number> <event_type> <macro_name>"
     echo "Example: ./submit_job.sh my_root.sh 'artToRoot.C(\"../data/input/\",\"../data/output/output.root\")' 01 nu_e_cc artToRoot"
+    echo "Example: ./submit_job.sh --dry-run ./batch-python.sh '3-dEdx-comparison.py --style contour' 01 mu_cc dEdx_comparison"
+    echo "Example: ./submit_job.sh --shards 20 ./batch-python.sh '8-all-plots.py --tree-file data/tree_1M.root' 01 mu_cc all_plots"
     exit 1
 fi
 
@@ -34,6 +54,84 @@ pbs_script="$scripts_dir/$file_name.pbs"
 # Job name
 job_name="${macro_name}_${event_type}_run${run_number}"
 
+# Resource request: fixed unless it can be estimated from measured runs of the python script
+# Usage: size_job <action> <shards> "<command>"; sets ncpus, mem and walltime
+size_job() {
+    ncpus=1
+    mem=32gb
+    walltime=01:00:00
+    if [ "$size_resources" -eq 1 ] && [[ "$(basename "$script_path")" == *python* ]]; then
+        read -r est_ncpus est_mem est_walltime < <("$script_path" -m nutau.resources --shards "$2" "$1" "$3" | tail -n 1)
+        if [ -n "$est_walltime" ]; then
+            ncpus=$est_ncpus
+            mem=$est_mem
+            walltime=$est_walltime
+        else
+            echo "Could not size the job, using the fixed request"
+        fi
+    fi
+}
+
+action=estimate
+[ "$dry_run" -eq 1 ] && action=dry-run
+size_job "$action" "$shards" "$command"
+echo "Requesting ncpus=$ncpus mem=$mem walltime=$walltime for $job_name"
+
+if [ "$shards" -gt 1 ]; then
+    # Every slice writes a histogram file; stale slices of an earlier submission are removed first
+    shard_dir="$job_dir/shards"
+    mkdir -p "$shard_dir"
+    rm -f "$shard_dir/$file_name"-shard-*.npz
+    shard_file="$shard_dir/$file_name-shard-\${PBS_ARRAY_INDEX}-of-$shards.npz"
+    out_dir="data/plots-new"
+    [[ "$command" =~ --out-dir[=\ ]+([^\ ]+) ]] && out_dir="${BASH_REMATCH[1]}"
+
+    # PBS array job: subjob i reads slice i of the entries
+    cat <<EOF >"$pbs_script"
+#!/bin/bash
+#PBS -N $job_name
+#PBS -J 0-$((shards - 1))
+#PBS -j oe
+#PBS -o $logs_dir/$file_name-^array_index^-output.log
+#PBS -e $logs_dir/$file_name-^array_index^-error.log
+#PBS -l select=1:ncpus=$ncpus:mem=$mem
+#PBS -l walltime=$walltime
+
+# Change to the specified directory
+cd /lstr/sahara/dune/tlabree/nutau-study-new
+# Execute the script on this subjob's slice, saving its histograms for the merge job
+"$script_path" '$command' --shard \$PBS_ARRAY_INDEX $shards --save-hists "$shard_file" --no-plots
+EOF
+
+    merge_command="9-merge-hists.py $shard_dir/$file_name-shard-*-of-$shards.npz --out-dir $out_dir --output $job_dir/$file_name-merged.npz"
+    # The merge reads histogram files, not ROOT trees, so it has no history to be sized from
+    ncpus=1
+    mem=32gb
+    walltime=01:00:00
+    echo "Requesting the fixed ncpus=$ncpus mem=$mem walltime=$walltime for the merge job (not sized)"
+    merge_script="$scripts_dir/$file_name-merge.pbs"
+    cat <<EOF >"$merge_script"
+#!/bin/bash
+#PBS -N ${job_name}_merge
+#PBS -j oe
+#PBS -o $logs_dir/$file_name-merge-output.log
+#PBS -e $logs_dir/$file_name-merge-error.log
+#PBS -l select=1:ncpus=$ncpus:mem=$mem
+#PBS -l walltime=$walltime
+
+# Change to the specified directory
+cd /lstr/sahara/dune/tlabree/nutau-study-new
+# Sum the slices and draw the plots
+"$script_path" '$merge_command'
+EOF
+
+    # Submit the array, then the merge job to start once every subjob has succeeded
+    array_id=$(qsub "$pbs_script") || exit 1
+    echo "$array_id"
+    qsub -W depend=afterok:"$array_id" "$merge_script"
+    exit 0
+fi
+
 # Create a PBS script with dynamic content
 cat <<EOF >"$pbs_script"
 #!/bin/bash
@@ -41,8 +139,8 @@ cat <<EOF >"$pbs_script"
 #PBS -j oe
 #PBS -o $logs_dir/$file_name-output.log
 #PBS -e $logs_dir/$file_name-error.log
-#PBS -l select=1:ncpus=1:mem=32gb
-#PBS -l walltime=01:00:00
+#PBS -l select=1:ncpus=$ncpus:mem=$mem
+#PBS -l walltime=$walltime
 
 # Change to the specified directory
 cd /lstr/sahara/dune/tlabree/nutau-study-new
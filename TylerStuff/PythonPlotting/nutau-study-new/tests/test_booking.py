@@ -0,0 +1,99 @@
+import awkward as ak
+import numpy as np
+import pytest
+
+from nutau.booking import HistBook, expression_branches
+
+
+def tracks_chunk(seed, n_events=40):
+    rng = np.random.default_rng(seed)
+    tracks = rng.integers(0, 6, n_events)
+    n_tracks = int(tracks.sum())
+    hits = rng.integers(0, 8, n_tracks)
+    n_hits = int(hits.sum())
+    score = rng.uniform(-0.1, 1.1, n_tracks)
+    score[rng.random(n_tracks) < 0.1] = np.nan
+    return ak.Array({
+        "truePdgCode": ak.unflatten(rng.choice([13, -13, 211, -211, 2212], n_tracks), tracks),
+        "trackScore": ak.unflatten(score, tracks),
+        "trackLength": ak.unflatten(rng.uniform(0, 300, n_tracks), tracks),
+        "hitdEdx": ak.unflatten(ak.unflatten(rng.exponential(2.0, n_hits), hits), tracks),
+    })
+
+
+def loop_histogram(values, hist):
+    """Counts, under/overflow and NaNs of a list of values in a Hist1D's binning"""
+    values = np.array(values, dtype=np.float64)
+    nan = np.isnan(values)
+    real = values[~nan]
+    counts, _ = np.histogram(real, bins=hist.edges)
+    return (counts.tolist(), int(np.sum(real < hist.edges[0])), int(np.sum(real > hist.edges[-1])),
+            int(nan.sum()))
+
+
+def as_tuple(hist):
+    return hist.counts.tolist(), hist.underflow, hist.overflow, hist.nan
+
+
+def test_expression_branches():
+    assert expression_branches("abs(truePdgCode) == 13") == {"truePdgCode"}
+    assert expression_branches("truncated_mean(hitdEdx, hitResRange) / sqrt(x)") == {"hitdEdx", "hitResRange", "x"}
+    assert expression_branches(None) == set()
+
+
+def test_selected_histograms_match_loops():
+    chunks = [tracks_chunk(seed) for seed in range(2)]
+    book = HistBook()
+    book.book("muon_score", "trackScore", 12, (0, 1), selection="abs(truePdgCode) == 13")
+    book.book("long_length", "trackLength", 10, (0, 300), selection="(trackLength > 100) & (truePdgCode > 0)")
+    book.book("muon_hit_dedx", "hitdEdx", 10, (0, 8), selection="abs(truePdgCode) == 13")
+    book.book("score_length", "trackScore", (4, 5), ((0, 1), (0, 300)), y="trackLength")
+    for chunk in chunks:
+        book.fill(chunk)
+    assert book.branches == ("hitdEdx", "trackLength", "trackScore", "truePdgCode")
+
+    tracks = [track for chunk in chunks for event in chunk.to_list()
+              for track in (dict(zip(event, values)) for values in zip(*event.values()))]
+    muon_scores = [t["trackScore"] for t in tracks if abs(t["truePdgCode"]) == 13]
+    long_lengths = [t["trackLength"] for t in tracks if t["trackLength"] > 100 and t["truePdgCode"] > 0]
+    # A per-track selection picks out every hit of the selected tracks
+    muon_hits = [d for t in tracks if abs(t["truePdgCode"]) == 13 for d in t["hitdEdx"]]
+    assert as_tuple(book["muon_score"]) == loop_histogram(muon_scores, book["muon_score"])
+    assert as_tuple(book["long_length"]) == loop_histogram(long_lengths, book["long_length"])
+    assert as_tuple(book["muon_hit_dedx"]) == loop_histogram(muon_hits, book["muon_hit_dedx"])
+
+    pairs = [(t["trackScore"], t["trackLength"]) for t in tracks if not np.isnan(t["trackScore"])]
+    expected, _, _ = np.histogram2d(*zip(*pairs), bins=[book["score_length"].xedges, book["score_length"].yedges])
+    assert book["score_length"].counts.tolist() == expected.astype(np.int64).tolist()
+
+
+def test_grouped_histograms_match_per_key_loops():
+    chunks = [tracks_chunk(seed) for seed in range(3)]
+    groups = {"mup": (13,), "mum": (-13,), "pip": (211,), "kaon": (321,)}
+    grouped, plain = HistBook(), HistBook()
+    grouped.book_grouped(groups, "trackScore", ("truePdgCode",), 10, (0, 1), selection="trackLength > 50")
+    for name, (pdg,) in groups.items():
+        plain.book(name, "trackScore", 10, (0, 1), selection=f"(trackLength > 50) & (truePdgCode == {pdg})")
+    for chunk in chunks:
+        grouped.fill(chunk)
+        plain.fill(chunk)
+    for name in groups:
+        assert as_tuple(grouped[name]) == as_tuple(plain[name])
+        assert grouped[name].entries == plain[name].entries
+    assert grouped["kaon"].counts.sum() == 0
+    assert grouped["mup"].counts.sum() > 0
+    with pytest.raises(ValueError):
+        grouped.book_grouped({"mup": (13,)}, "trackScore", ("truePdgCode",), 10, (0, 1))
+
+
+def test_merge_adds_books():
+    chunks = [tracks_chunk(seed) for seed in range(2)]
+    whole, first, second = HistBook(), HistBook(), HistBook()
+    for book in (whole, first, second):
+        book.book("score", "trackScore", 10, (0, 1))
+    whole.fill(chunks[0])
+    whole.fill(chunks[1])
+    first.fill(chunks[0])
+    second.fill(chunks[1])
+    first.merge(second)
+    assert as_tuple(first["score"]) == as_tuple(whole["score"])
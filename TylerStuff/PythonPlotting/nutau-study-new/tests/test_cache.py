@@ -0,0 +1,78 @@
+import os
+
+import awkward as ak
+import pytest
+
+from nutau import cache
+
+
+def make_entry(directory, name, size, mtime):
+    entry = directory / name
+    entry.mkdir()
+    (entry / "chunk-00000.parquet").write_bytes(b"x" * size)
+    os.utime(entry, (mtime, mtime))
+    return entry
+
+
+def test_cache_key_follows_file_and_selection(tmp_path):
+    path = tmp_path / "file.root"
+    path.write_bytes(b"abc")
+    os.utime(path, (1000, 1000))
+    key = cache.cache_key(path, ["tree", ["x"]])
+    assert cache.cache_key(path, ["tree", ["x"]]) == key
+    assert cache.cache_key(path, ["tree", ["y"]]) != key
+    os.utime(path, (2000, 2000))
+    assert cache.cache_key(path, ["tree", ["x"]]) != key
+    changed = cache.cache_key(path, ["tree", ["x"]])
+    path.write_bytes(b"abcd")
+    os.utime(path, (2000, 2000))
+    assert cache.cache_key(path, ["tree", ["x"]]) != changed
+
+
+def test_evict_removes_least_recently_used(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "CACHE_DIR", str(tmp_path))
+    for i in range(5):
+        make_entry(tmp_path, f"entry{i}", 100, 1000 + i)
+    (tmp_path / ".tmp-writing").mkdir()
+    cache.evict(max_bytes=250)
+    assert sorted(os.listdir(tmp_path)) == [".tmp-writing", "entry3", "entry4"]
+    cache.evict(max_bytes=250)
+    assert sorted(os.listdir(tmp_path)) == [".tmp-writing", "entry3", "entry4"]
+
+
+def test_evict_tolerates_vanished_entries(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "CACHE_DIR", str(tmp_path))
+    for i in range(3):
+        make_entry(tmp_path, f"entry{i}", 100, 1000 + i)
+    listdir = os.listdir
+
+    def racing_listdir(path):
+        names = listdir(path)
+        # Another job evicts the oldest entry right after this one listed the cache
+        if os.path.realpath(path) == os.path.realpath(tmp_path) and (tmp_path / "entry0").exists():
+            (tmp_path / "entry0" / "chunk-00000.parquet").unlink()
+            (tmp_path / "entry0").rmdir()
+        return names
+
+    monkeypatch.setattr(cache.os, "listdir", racing_listdir)
+    cache.evict(max_bytes=150)
+    assert sorted(listdir(tmp_path)) == ["entry2"]
+    assert cache.entry_bytes(str(tmp_path / "missing")) == 0
+
+
+def test_cached_chunks_round_trip(tmp_path, monkeypatch):
+    pytest.importorskip("pyarrow")
+    monkeypatch.setattr(cache, "CACHE_DIR", str(tmp_path / "cache"))
+    source = tmp_path / "file.root"
+    source.write_bytes(b"abc")
+    chunks = [ak.Array({"x": [[1, 2], [3]]}), ak.Array({"x": [[], [4]]})]
+    reads = []
+
+    def read():
+        reads.append(1)
+        yield from chunks
+
+    first = list(cache.cached_chunks(source, ["x"], read))
+    second = list(cache.cached_chunks(source, ["x"], read))
+    assert len(reads) == 1
+    assert [c.to_list() for c in first] == [c.to_list() for c in second] == [c.to_list() for c in chunks]
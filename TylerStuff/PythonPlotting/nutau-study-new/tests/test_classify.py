@@ -0,0 +1,46 @@
+import awkward as ak
+import numpy as np
+
+from nutau.classify import NON_RECONSTRUCTABLE, is_nuclear, is_reconstructable, is_visible
+
+CODES = [13, -13, 211, -211, 2212, -2212, 22, 11, -11, 12, -14, 16, 111, 2112, -2112, 321, 3122,
+         1000180400, 1000010020, 2000000001, 310]
+
+
+def is_visible_reference(pdg, energy):
+    """The original per-particle check"""
+    if abs(pdg) in (12, 14, 16, 111, 2112):
+        visible = False
+    elif pdg in (211, -211):
+        visible = energy > 0.1
+    elif pdg == 2212:
+        visible = energy > 0.05
+    elif pdg in (22, 11, -11, 13, -13):
+        visible = energy > 0.03
+    else:
+        visible = True
+    return visible and not pdg > 1000000000
+
+
+def test_visible_matches_per_particle_check():
+    rng = np.random.default_rng(5)
+    sizes = rng.integers(0, 8, 100)
+    n = int(sizes.sum())
+    codes = rng.choice(CODES, n)
+    energies = rng.choice([0.0, 0.03, 0.04, 0.05, 0.06, 0.1, 0.2], n)
+    jagged = is_visible(ak.unflatten(codes, sizes), ak.unflatten(energies, sizes))
+    expected = [is_visible_reference(int(c), float(e)) for c, e in zip(codes, energies)]
+    assert ak.num(jagged).tolist() == sizes.tolist()
+    assert ak.flatten(jagged).tolist() == expected
+    assert is_visible(codes, energies).tolist() == expected
+
+
+def test_reconstructable_and_nuclear():
+    codes = np.array(CODES)
+    assert is_reconstructable(codes).tolist() == [abs(c) not in NON_RECONSTRUCTABLE for c in CODES]
+    assert is_nuclear(codes).tolist() == [c > 1000000000 for c in CODES]
+    # Signed matching, as 4-unreco.py uses it
+    signed = {2112, 22, 12, -12}
+    assert is_reconstructable(codes, signed, exact=True).tolist() == [c not in signed for c in CODES]
+    jagged = ak.Array([[13, 2112], [], [-2112]])
+    assert is_reconstructable(jagged, signed, exact=True).tolist() == [[True, False], [], [True]]
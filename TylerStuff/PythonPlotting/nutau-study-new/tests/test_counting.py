@@ -0,0 +1,77 @@
+from collections import Counter
+
+import awkward as ak
+import numpy as np
+
+from nutau.counting import PdgCounts, aggregate, lookup_rows
+
+
+def gen1_chunk(seed, n_events=50):
+    rng = np.random.default_rng(seed)
+    sizes = rng.integers(0, 12, n_events)
+    n = int(sizes.sum())
+    return ak.Array({
+        "eventID": np.arange(n_events) + 1000 * seed,
+        "sim": ak.unflatten(rng.integers(0, 2, n), sizes),
+        "reco": ak.unflatten(rng.integers(0, 2, n), sizes),
+        "simPdgCode": ak.unflatten(rng.choice([13, -13, 211, -211, 2212, 22, 1000180400], n), sizes),
+        "simGeneration": ak.unflatten(rng.integers(1, 4, n), sizes),
+    })
+
+
+def count_by_loop(chunks, by):
+    sim, reco = Counter(), Counter()
+    for chunk in chunks:
+        for event in chunk.to_list():
+            for i, pdg in enumerate(event["simPdgCode"]):
+                if event["sim"][i] != 1:
+                    continue
+                key = tuple(event[name] if name == "eventID" else event[name][i] for name in by)
+                sim[key] += 1
+                reco[key] += event["reco"][i] == 1
+    return sim, reco
+
+
+def as_dicts(counts):
+    keys = [tuple(row) for row in counts.keys.tolist()]
+    return dict(zip(keys, counts.sim.tolist())), dict(zip(keys, counts.reco.tolist()))
+
+
+def test_aggregate_matches_counter():
+    rng = np.random.default_rng(1)
+    keys = rng.integers(-3, 3, size=(500, 2))
+    weights = rng.integers(0, 5, size=(500, 1))
+    unique, sums = aggregate(keys, weights)
+    expected = Counter()
+    for key, weight in zip(map(tuple, keys.tolist()), weights[:, 0].tolist()):
+        expected[key] += weight
+    assert [tuple(k) for k in unique.tolist()] == sorted(expected)
+    assert sums[:, 0].tolist() == [expected[key] for key in sorted(expected)]
+
+
+def test_lookup_rows_matches_dict():
+    table = np.array([[211, 1], [-211, 1], [13, 2], [2212, 1]])
+    rows = np.array([[13, 2], [211, 1], [13, 1], [2212, 1], [22, 1], [-211, 1]])
+    positions = {tuple(row): i for i, row in enumerate(table.tolist())}
+    assert lookup_rows(rows, table).tolist() == [positions.get(tuple(row), -1) for row in rows.tolist()]
+
+
+def test_pdg_counts_fill_and_merge():
+    chunks = [gen1_chunk(seed) for seed in range(3)]
+    for by in [("simPdgCode",), ("simGeneration", "simPdgCode"), ("eventID", "simPdgCode")]:
+        filled = PdgCounts(by)
+        for chunk in chunks[:2]:
+            filled.fill(chunk)
+        other = PdgCounts(by)
+        other.fill(chunks[2])
+        filled.merge(other)
+        assert as_dicts(filled) == tuple(dict(c) for c in count_by_loop(chunks, by))
+
+
+def test_pdg_counts_compacts_many_chunks():
+    chunks = [gen1_chunk(seed, n_events=5) for seed in range(PdgCounts.MAX_PENDING + 5)]
+    counts = PdgCounts()
+    for chunk in chunks:
+        counts.fill(chunk)
+    sim, reco = count_by_loop(chunks, ("simPdgCode",))
+    assert as_dicts(counts) == (dict(sim), dict(reco))
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from nutau.accumulators import Hist1D
+from nutau.cutscan import CutScan, passing, total
+
+
+def filled(values, bins=10, range=(0, 1)):
+    hist = Hist1D(bins, range)
+    hist.fill(np.asarray(values, dtype=np.float64))
+    return hist
+
+
+def test_passing_matches_counting_values():
+    rng = np.random.default_rng(4)
+    values = np.concatenate([rng.uniform(-0.2, 1.2, 300), [0.0, 1.0, 0.5, np.nan, np.nan]])
+    hist = filled(values)
+    real = values[~np.isnan(values)]
+    last = hist.edges[-1]
+    # >= edge, except that values equal to the last edge sit in the last bin and count as below
+    above = [int(np.sum((real >= edge) & ((real > last) | (real < last) | (edge < last)))) for edge in hist.edges]
+    below = [len(real) - a for a in above]
+    assert passing(hist, "above").tolist() == above
+    assert passing(hist, "below").tolist() == below
+    assert total(hist) == len(values)
+    assert hist.nan == 2
+    with pytest.raises(ValueError):
+        passing(hist, "sideways")
+
+
+def test_efficiencies_count_nan_and_out_of_range():
+    signal = filled([0.95, 0.85, 0.75, 1.5, np.nan])
+    background = filled([0.1, 0.2, 0.75, -0.5])
+    scan = CutScan(signal, background, keep="above")
+    assert scan.signal_total == 5
+    assert scan.background_total == 4
+    i = int(np.argmin(np.abs(scan.thresholds - 0.7)))
+    # 0.95, 0.85, 0.75 and the overflow pass; the NaN counts in the total but never passes
+    assert scan.signal_efficiency[i] == pytest.approx(4 / 5)
+    assert scan.background_efficiency[i] == pytest.approx(1 / 4)
+    assert scan.background_efficiency[0] == pytest.approx(3 / 4)
+
+
+def test_auc_and_roc_ends():
+    scan = CutScan(filled([0.9] * 10), filled([0.1] * 10))
+    x, y = scan.roc()
+    assert (x[0], y[0], x[-1], y[-1]) == (0, 0, 1, 1)
+    assert scan.auc() == pytest.approx(1.0)
+    mixed = CutScan(filled([0.5] * 10), filled([0.5] * 10))
+    assert mixed.auc() == pytest.approx(0.5)
+
+
+def test_best_skips_cuts_removing_no_background():
+    # The first edge keeps everything, the best real cut is at 0.5
+    scan = CutScan(filled([0.6, 0.7, 0.8, 0.2]), filled([0.1, 0.2, 0.3, 0.4]))
+    best = scan.best()
+    assert best["threshold"] == pytest.approx(0.5)
+    assert best["background_efficiency"] == 0
+    # Background at the very top can't be removed by any "above" cut short of the overflow
+    assert CutScan(filled([0.1]), filled([2.0])).best() is None
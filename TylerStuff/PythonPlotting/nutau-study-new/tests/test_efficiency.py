@@ -0,0 +1,87 @@
+import math
+from statistics import NormalDist
+
+import awkward as ak
+import numpy as np
+import pytest
+
+from nutau.efficiency import EfficiencyCurves, clopper_pearson, wilson
+
+CASES = [(0, 10), (1, 10), (5, 10), (9, 10), (10, 10), (3, 7), (0, 1), (1, 1), (250, 1000)]
+
+
+def wilson_reference(k, n, cl):
+    z = NormalDist().inv_cdf(0.5 + cl / 2)
+    p = k / n
+    centre = (p + z * z / (2 * n)) / (1 + z * z / n)
+    half = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / (1 + z * z / n)
+    return max(0.0, centre - half), min(1.0, centre + half)
+
+
+def binomial_cdf(k, n, p):
+    return sum(math.comb(n, i) * p**i * (1 - p) ** (n - i) for i in range(k + 1))
+
+
+def solve(f, target):
+    """p in [0, 1] with f(p) == target for a decreasing f, by bisection"""
+    low, high = 0.0, 1.0
+    for _ in range(100):
+        mid = (low + high) / 2
+        low, high = (mid, high) if f(mid) > target else (low, mid)
+    return (low + high) / 2
+
+
+def clopper_pearson_reference(k, n, cl):
+    alpha = 1 - cl
+    low = 0.0 if k == 0 else solve(lambda p: -(1 - binomial_cdf(k - 1, n, p)), -alpha / 2)
+    high = 1.0 if k == n else solve(lambda p: binomial_cdf(k, n, p), alpha / 2)
+    return low, high
+
+
+@pytest.mark.parametrize("cl", [0.6827, 0.95])
+def test_wilson(cl):
+    k, n = np.array(CASES).T
+    low, high = wilson(k, n, cl)
+    for (ki, ni), lo, hi in zip(CASES, low, high):
+        assert (lo, hi) == pytest.approx(wilson_reference(ki, ni, cl), abs=1e-12)
+    assert np.isnan(wilson(0, 0)).all()
+
+
+@pytest.mark.parametrize("cl", [0.6827, 0.95])
+def test_clopper_pearson(cl):
+    pytest.importorskip("scipy")
+    k, n = np.array(CASES).T
+    low, high = clopper_pearson(k, n, cl)
+    for (ki, ni), lo, hi in zip(CASES, low, high):
+        assert (lo, hi) == pytest.approx(clopper_pearson_reference(ki, ni, cl), abs=1e-9)
+
+
+def test_curves_match_loop():
+    rng = np.random.default_rng(3)
+    sizes = rng.integers(0, 10, 60)
+    n = int(sizes.sum())
+    energy = rng.uniform(-0.5, 5.5, n)
+    energy[:3] = [0.0, 5.0, 2.5]  # edges
+    chunk = ak.Array({
+        "sim": ak.unflatten(rng.integers(0, 2, n), sizes),
+        "reco": ak.unflatten(rng.integers(0, 2, n), sizes),
+        "simPdgCode": ak.unflatten(rng.choice([13, 211, 2212], n), sizes),
+        "simEnergy": ak.unflatten(energy, sizes),
+    })
+    curves = EfficiencyCurves(bins=10, range=(0, 5))
+    curves.fill(chunk)
+    codes, sim, reco = curves.matrix()
+
+    expected_sim = np.zeros((3, 10), dtype=np.int64)
+    expected_reco = np.zeros((3, 10), dtype=np.int64)
+    for event in chunk.to_list():
+        for s, r, pdg, e in zip(event["sim"], event["reco"], event["simPdgCode"], event["simEnergy"]):
+            if s != 1 or not 0 <= e <= 5:
+                continue
+            column = min(int(e / 0.5), 9)
+            row = [13, 211, 2212].index(pdg)
+            expected_sim[row, column] += 1
+            expected_reco[row, column] += r == 1
+    assert codes.tolist() == [13, 211, 2212]
+    assert sim.tolist() == expected_sim.tolist()
+    assert reco.tolist() == expected_reco.tolist()
@@ -0,0 +1,88 @@
+import json
+
+import awkward as ak
+import numpy as np
+import pytest
+
+from nutau import histfile
+from nutau.booking import HistBook
+
+
+def filled_book(seed):
+    rng = np.random.default_rng(seed)
+    values = rng.uniform(-1, 11, 200)
+    values[:5] = np.nan
+    book = HistBook()
+    book.book("x", "x", 10, (0, 10), selection="x > 1")
+    book.book("xy", "x", (5, 5), ((0, 10), (0, 10)), y="y")
+    book.fill(ak.Array({"x": values, "y": rng.uniform(0, 10, 200)}))
+    return book
+
+
+def same_hist(a, b):
+    if hasattr(a, "edges"):
+        return (np.array_equal(a.edges, b.edges) and np.array_equal(a.counts, b.counts)
+                and (a.entries, a.min, a.max, a.underflow, a.overflow, a.nan)
+                == (b.entries, b.min, b.max, b.underflow, b.overflow, b.nan))
+    return (np.array_equal(a.xedges, b.xedges) and np.array_equal(a.yedges, b.yedges)
+            and np.array_equal(a.counts, b.counts))
+
+
+def test_round_trip(tmp_path):
+    book = filled_book(0)
+    path = tmp_path / "hists.npz"
+    histfile.write(path, {"tree": book}, counters={"events": 200}, metadata={"inputs": ["a.root"]})
+    books, counters, metadata = histfile.read(path)
+    assert counters == {"events": 200}
+    assert metadata == {"inputs": ["a.root"]}
+    assert books["tree"].bookings["x"].selection == "x > 1"
+    for name in ("x", "xy"):
+        assert same_hist(books["tree"][name], book[name])
+
+
+def test_merge_sums_jobs(tmp_path):
+    paths = []
+    for seed in range(3):
+        paths.append(tmp_path / f"hists{seed}.npz")
+        histfile.write(paths[-1], {"tree": filled_book(seed)}, counters={"events": 200},
+                       metadata={"inputs": [f"{seed}.root"]})
+    books, counters, metadata = histfile.merge(paths)
+    expected = filled_book(0)
+    for seed in (1, 2):
+        expected.merge(filled_book(seed))
+    assert counters == {"events": 600}
+    assert metadata["inputs"] == ["0.root", "1.root", "2.root"]
+    for name in ("x", "xy"):
+        assert same_hist(books["tree"][name], expected[name])
+
+
+def test_reads_files_without_flow_and_nan_counts(tmp_path):
+    path = tmp_path / "hists.npz"
+    histfile.write(path, {"tree": filled_book(0)})
+    # Rewrite the header the way files from before under/overflow and NaN counting look
+    with np.load(path) as f:
+        arrays = dict(f)
+    header = json.loads(str(arrays["header"]))
+    for info in header["books"]["tree"].values():
+        for key in ("underflow", "overflow", "nan"):
+            info.pop(key, None)
+    arrays["header"] = np.array(json.dumps(header))
+    np.savez_compressed(path, **arrays)
+
+    books, _, _ = histfile.read(path)
+    hist = books["tree"]["x"]
+    assert (hist.underflow, hist.overflow, hist.nan) == (0, 0, 0)
+    assert hist.counts.tolist() == filled_book(0)["x"].counts.tolist()
+
+
+def test_rejects_other_versions(tmp_path):
+    path = tmp_path / "hists.npz"
+    histfile.write(path, {"tree": filled_book(0)})
+    with np.load(path) as f:
+        arrays = dict(f)
+    header = json.loads(str(arrays["header"]))
+    header["version"] = histfile.FORMAT_VERSION + 1
+    arrays["header"] = np.array(json.dumps(header))
+    np.savez_compressed(path, **arrays)
+    with pytest.raises(ValueError):
+        histfile.read(path)
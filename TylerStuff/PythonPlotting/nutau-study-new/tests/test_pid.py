@@ -0,0 +1,53 @@
+import math
+
+import awkward as ak
+import numpy as np
+
+from nutau.pid import end_dedx, truncated_mean
+
+
+def truncated_mean_reference(dedx, res_range, keep=0.6):
+    good = sorted(d for d, r in zip(dedx, res_range)
+                  if not math.isnan(d) and not math.isnan(r) and d > 0 and r >= 0)
+    kept = good[:math.ceil(len(good) * keep)]
+    return sum(kept) / len(kept) if kept else math.nan
+
+
+def tracks(seed):
+    rng = np.random.default_rng(seed)
+    hits = rng.integers(0, 12, 60)
+    n = int(hits.sum())
+    dedx = rng.exponential(2.0, n)
+    dedx[rng.random(n) < 0.1] = np.nan
+    dedx[rng.random(n) < 0.05] = -1.0
+    res_range = rng.uniform(-1, 40, n)
+    return ak.unflatten(dedx, hits), ak.unflatten(res_range, hits)
+
+
+def same(got, expected):
+    return all((math.isnan(a) and math.isnan(b)) or math.isclose(a, b, rel_tol=1e-12)
+               for a, b in zip(got, expected)) and len(got) == len(expected)
+
+
+def test_truncated_mean_matches_per_track_loop():
+    dedx, res_range = tracks(6)
+    for keep in (0.6, 1.0, 0.2):
+        expected = [truncated_mean_reference(d, r, keep) for d, r in zip(dedx.to_list(), res_range.to_list())]
+        assert same(truncated_mean(dedx, res_range, keep).to_list(), expected)
+
+
+def test_event_track_hit_nesting():
+    dedx, res_range = tracks(7)
+    events = ak.unflatten(dedx, [20, 0, 40]), ak.unflatten(res_range, [20, 0, 40])
+    nested = truncated_mean(*events)
+    assert ak.num(nested).tolist() == [20, 0, 40]
+    assert same(ak.flatten(nested).to_list(), truncated_mean(dedx, res_range).to_list())
+
+
+def test_end_dedx_matches_loop():
+    dedx, res_range = tracks(8)
+    expected = []
+    for d, r in zip(dedx.to_list(), res_range.to_list()):
+        near = [x for x, y in zip(d, r) if not math.isnan(x) and x > 0 and 0 <= y <= 5.0]
+        expected.append(sum(near) / len(near) if near else math.nan)
+    assert same(end_dedx(dedx, res_range).to_list(), expected)
@@ -0,0 +1,41 @@
+from collections import Counter
+
+import awkward as ak
+import numpy as np
+
+from nutau.simid import simid_multiplicity
+
+
+def test_jagged_matches_counter_per_event():
+    rng = np.random.default_rng(2)
+    sizes = rng.integers(0, 15, 40)
+    ids = ak.unflatten(rng.integers(-1, 6, sizes.sum()), sizes)
+    reco = ak.unflatten(rng.integers(0, 2, sizes.sum()).astype(bool), sizes)
+    result = simid_multiplicity(ids, reco, ignore=-1)
+
+    expected = {}
+    for event, (event_ids, event_reco) in enumerate(zip(ids.to_list(), reco.to_list())):
+        counts, reco_counts = Counter(), Counter()
+        for sim_id, is_reco in zip(event_ids, event_reco):
+            if sim_id != -1:
+                counts[sim_id] += 1
+                reco_counts[sim_id] += is_reco
+        for sim_id in sorted(counts):
+            expected[(event, sim_id)] = (counts[sim_id], reco_counts[sim_id])
+
+    got = {(e, s): (c, r) for e, s, c, r in zip(result.event.tolist(), result.sim_id.tolist(),
+                                                 result.count.tolist(), result.reco_count.tolist())}
+    assert got == expected
+    assert list(got) == sorted(expected)
+    assert result.unique_per_event().tolist() == [sum(1 for e, _ in expected if e == event)
+                                                  for event in range(len(ids))]
+    assert result.multi_per_event().tolist() == [sum(1 for (e, _), (c, _) in expected.items() if e == event and c > 1)
+                                                 for event in range(len(ids))]
+
+
+def test_flat_event():
+    result = simid_multiplicity(np.array([4, 2, 4, -1, 4, 2, 7]))
+    assert result.sim_id.tolist() == [-1, 2, 4, 7]
+    assert result.count.tolist() == [1, 2, 3, 1]
+    assert result.multi.tolist() == [False, True, True, False]
+    assert result.reco_count.tolist() == [0, 0, 0, 0]